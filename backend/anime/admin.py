@@ -5,7 +5,6 @@ from django.http import HttpResponseRedirect
 from django.urls import path, reverse
 from django.db.models import Count, Q
 from django.utils import timezone
-import json
 from datetime import timedelta
 
 from .models import (
@@ -219,7 +218,7 @@ class AnimeAdmin(admin.ModelAdmin):
         return HttpResponseRedirect("../")
         
     def update_episodes(self, request):
-        ongoing_count = Anime.objects.filter(status='ongoing').count()
+        ongoing_count = Anime.objects.filter(status=Anime.Status.ONGOING).count()
         
         task = update_anime_episodes_task.delay(count=20)
         
@@ -466,12 +465,10 @@ class AnimeAdmin(admin.ModelAdmin):
     )
     
     def display_poster(self, obj):
-        """Display poster from URL or file, with safety checks"""
+        """Display poster from URL, with safety checks"""
         try:
             if hasattr(obj, 'poster_url') and obj.poster_url:
                 return format_html('<img src="{}" width="50" height="70" />', obj.poster_url)
-            elif hasattr(obj, 'poster') and obj.poster and hasattr(obj.poster, 'url'):
-                return format_html('<img src="{}" width="50" height="70" />', obj.poster.url)
         except Exception as e:
             return f"Помилка: {str(e)}"
         return "Немає постера"
@@ -482,8 +479,6 @@ class AnimeAdmin(admin.ModelAdmin):
         try:
             if hasattr(obj, 'poster_url') and obj.poster_url:
                 return format_html('<img src="{}" width="200" /><br>URL: {}', obj.poster_url, obj.poster_url)
-            elif hasattr(obj, 'poster') and obj.poster and hasattr(obj.poster, 'url'):
-                return format_html('<img src="{}" width="200" /><br>URL: {}', obj.poster.url, obj.poster.url)
         except Exception as e:
             return f"Помилка: {str(e)}"
         return "Немає URL постера"
@@ -494,8 +489,6 @@ class AnimeAdmin(admin.ModelAdmin):
         try:
             if hasattr(obj, 'banner_url') and obj.banner_url:
                 return format_html('<img src="{}" width="400" /><br>URL: {}', obj.banner_url, obj.banner_url)
-            elif hasattr(obj, 'banner') and obj.banner and hasattr(obj.banner, 'url'):
-                return format_html('<img src="{}" width="400" /><br>URL: {}', obj.banner.url, obj.banner.url)
         except Exception as e:
             return f"Помилка: {str(e)}"
         return "Немає URL банера"
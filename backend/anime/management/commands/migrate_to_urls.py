@@ -1,6 +1,5 @@
 from django.core.management.base import BaseCommand
-from anime.models import Anime, AnimeScreenshot, Episode
-from django.db.models import Q
+from anime.models import AnimeScreenshot, Episode
 
 class Command(BaseCommand):
     help = 'Migrates image fields to URL fields for existing records'
@@ -8,22 +7,7 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         self.stdout.write('Starting migration of image fields to URLs...')
         
-        # Process anime records
-        anime_count = 0
-        for anime in Anime.objects.filter(Q(poster__isnull=False) | Q(banner__isnull=False)):
-            updated = False
-            
-            if anime.poster and not anime.poster_url:
-                anime.poster_url = anime.poster.url
-                updated = True
-                
-            if anime.banner and not anime.banner_url:
-                anime.banner_url = anime.banner.url
-                updated = True
-                
-            if updated:
-                anime.save(update_fields=['poster_url', 'banner_url'])
-                anime_count += 1
+        # Anime posters and banners are migrated by anime migration 0010
         
         # Process screenshots
         screenshot_count = 0
@@ -43,7 +27,6 @@ class Command(BaseCommand):
         
         self.stdout.write(self.style.SUCCESS(
             f'Successfully migrated images to URLs:\n'
-            f'- {anime_count} anime records\n'
             f'- {screenshot_count} screenshots\n'
             f'- {episode_count} episodes'
         ))
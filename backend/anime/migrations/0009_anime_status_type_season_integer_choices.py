@@ -0,0 +1,58 @@
+from django.db import migrations, models
+
+
+STATUS_VALUES = {'announced': 1, 'completed': 2, 'dropped': 3, 'ongoing': 4}
+TYPE_VALUES = {'tv': 1, 'movie': 2, 'ova': 3, 'ona': 4, 'special': 5}
+SEASON_VALUES = {'winter': 1, 'spring': 2, 'summer': 3, 'fall': 4}
+
+FIELD_VALUES = {
+    'status': (STATUS_VALUES, STATUS_VALUES['ongoing']),
+    'type': (TYPE_VALUES, TYPE_VALUES['tv']),
+    'season': (SEASON_VALUES, None),
+}
+
+
+def strings_to_codes(apps, schema_editor):
+    """Rewrite the old string values as numeric strings so the column cast succeeds"""
+    Anime = apps.get_model('anime', 'Anime')
+    for field, (values, default) in FIELD_VALUES.items():
+        for old_value in Anime.objects.values_list(field, flat=True).distinct():
+            if old_value is None:
+                continue
+            new_value = values.get(old_value, default)
+            Anime.objects.filter(**{field: old_value}).update(
+                **{field: str(new_value) if new_value is not None else None}
+            )
+
+
+def codes_to_strings(apps, schema_editor):
+    Anime = apps.get_model('anime', 'Anime')
+    for field, (values, _) in FIELD_VALUES.items():
+        for old_value, code in values.items():
+            Anime.objects.filter(**{field: str(code)}).update(**{field: old_value})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('anime', '0008_apirequestlog_apiusagestatistics_updatestrategy_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(strings_to_codes, codes_to_strings),
+        migrations.AlterField(
+            model_name='anime',
+            name='status',
+            field=models.SmallIntegerField(choices=[(1, 'Анонсовано'), (2, 'Завершено'), (3, 'Покинуто'), (4, 'Онгоінг')], db_index=True, default=4, verbose_name='Статус'),
+        ),
+        migrations.AlterField(
+            model_name='anime',
+            name='type',
+            field=models.SmallIntegerField(choices=[(1, 'TV Серіал'), (2, 'Фільм'), (3, 'OVA'), (4, 'ONA'), (5, 'Спешл')], db_index=True, default=1, verbose_name='Тип'),
+        ),
+        migrations.AlterField(
+            model_name='anime',
+            name='season',
+            field=models.SmallIntegerField(blank=True, choices=[(1, 'Зима'), (2, 'Весна'), (3, 'Літо'), (4, 'Осінь')], db_index=True, null=True, verbose_name='Сезон'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+from django.db.models import Q
+
+
+def copy_images_to_urls(apps, schema_editor):
+    """Move any remaining poster/banner files into the URL fields before dropping them"""
+    Anime = apps.get_model('anime', 'Anime')
+    to_update = []
+    for anime in Anime.objects.filter(Q(poster__gt='') | Q(banner__gt='')).iterator():
+        changed = False
+        if anime.poster and not anime.poster_url:
+            anime.poster_url = anime.poster.url
+            changed = True
+        if anime.banner and not anime.banner_url:
+            anime.banner_url = anime.banner.url
+            changed = True
+        if changed:
+            to_update.append(anime)
+    Anime.objects.bulk_update(to_update, ['poster_url', 'banner_url'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('anime', '0009_anime_status_type_season_integer_choices'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_images_to_urls, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='anime',
+            name='poster',
+        ),
+        migrations.RemoveField(
+            model_name='anime',
+            name='banner',
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('anime', '0010_remove_anime_poster_banner'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='anime',
+            name='data_hash',
+            field=models.CharField(blank=True, max_length=32, verbose_name='Хеш даних API'),
+        ),
+    ]
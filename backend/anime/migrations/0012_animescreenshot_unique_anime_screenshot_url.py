@@ -0,0 +1,32 @@
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_screenshots(apps, schema_editor):
+    """Keep the oldest screenshot for every (anime, image_url) pair so the constraint can be added"""
+    AnimeScreenshot = apps.get_model('anime', 'AnimeScreenshot')
+    duplicates = (
+        AnimeScreenshot.objects.exclude(image_url='')
+        .values('anime_id', 'image_url')
+        .annotate(keep_id=Min('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for row in duplicates.iterator():
+        AnimeScreenshot.objects.filter(
+            anime_id=row['anime_id'], image_url=row['image_url']
+        ).exclude(id=row['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('anime', '0011_anime_data_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_screenshots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='animescreenshot',
+            constraint=models.UniqueConstraint(condition=models.Q(('image_url', ''), _negated=True), fields=('anime', 'image_url'), name='unique_anime_screenshot_url'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('anime', '0012_animescreenshot_unique_anime_screenshot_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='anime',
+            name='description_hash',
+            field=models.CharField(blank=True, max_length=32, verbose_name='Хеш джерела опису'),
+        ),
+    ]
@@ -3,6 +3,13 @@ from django.utils import timezone
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
 import datetime
+import re
+import unicodedata
+
+_SLUG_STRIP_RE = re.compile(r'[^a-z0-9-]+')
+
+# Скільки символів назви обробляти для slug (сам slug обрізається до 250)
+SLUG_SOURCE_LENGTH = 400
 
 class Genre(models.Model):
     name = models.CharField('Оригінальна назва', max_length=100, unique=True)
@@ -40,28 +47,41 @@ class DubbingStudio(models.Model):
         verbose_name = 'Студія дубляжу'
         verbose_name_plural = 'Студії дубляжу'
 
+def _fast_slug(anime):
+    """Build a cheap deterministic slug for anime with a known MAL ID"""
+    # ASCII-only назви не потребують транслітерації
+    # Вхід обрізаємо до обробки: усе, що далі SLUG_SOURCE_LENGTH символів, однаково відкидається
+    if anime.title_english and anime.title_english.isascii():
+        source = anime.title_english[:SLUG_SOURCE_LENGTH]
+    else:
+        source = (anime.title_original or anime.title_ukrainian or '')[:SLUG_SOURCE_LENGTH]
+        source = unicodedata.normalize('NFKD', source).encode('ascii', 'ignore').decode()
+
+    base = _SLUG_STRIP_RE.sub('-', source.lower()).strip('-')[:240]
+    # MAL ID робить slug унікальним без додаткових запитів до БД
+    return f"{base}-{anime.mal_id}" if base else f"anime-{anime.mal_id}"
+
 class Anime(models.Model):
-    STATUS_CHOICES = [
-        ('ongoing', 'Онгоінг'),
-        ('completed', 'Завершено'),
-        ('announced', 'Анонсовано'),
-        ('dropped', 'Покинуто'),
-    ]
-    
-    TYPE_CHOICES = [
-        ('tv', 'TV Серіал'),
-        ('movie', 'Фільм'),
-        ('ova', 'OVA'),
-        ('ona', 'ONA'),
-        ('special', 'Спешл'),
-    ]
-    
-    SEASON_CHOICES = [
-        ('winter', 'Зима'),
-        ('spring', 'Весна'),
-        ('summer', 'Літо'),
-        ('fall', 'Осінь'),
-    ]
+    class Status(models.IntegerChoices):
+        # Порядок значень збігається з попереднім рядковим сортуванням,
+        # тож order_by('-status') як і раніше ставить онгоінги першими
+        ANNOUNCED = 1, 'Анонсовано'
+        COMPLETED = 2, 'Завершено'
+        DROPPED = 3, 'Покинуто'
+        ONGOING = 4, 'Онгоінг'
+
+    class Type(models.IntegerChoices):
+        TV = 1, 'TV Серіал'
+        MOVIE = 2, 'Фільм'
+        OVA = 3, 'OVA'
+        ONA = 4, 'ONA'
+        SPECIAL = 5, 'Спешл'
+
+    class Season(models.IntegerChoices):
+        WINTER = 1, 'Зима'
+        SPRING = 2, 'Весна'
+        SUMMER = 3, 'Літо'
+        FALL = 4, 'Осінь'
 
     # Titles
     title_original = models.CharField('Оригінальна назва', max_length=255)
@@ -76,24 +96,20 @@ class Anime(models.Model):
     # Details
     description = models.TextField('Опис')
     
-    # Changed from ImageField to URLField
+    # Images are stored as external URLs
     poster_url = models.URLField('URL постера', max_length=500, blank=True)
     banner_url = models.URLField('URL банера', max_length=500, blank=True)
     
-    # Keeping these for backward compatibility, but will be deprecated
-    poster = models.ImageField(upload_to='anime/posters/', blank=True, null=True)
-    banner = models.ImageField(upload_to='anime/banners/', blank=True, null=True)
-    
     youtube_trailer = models.CharField('YouTube трейлер', max_length=255, blank=True)
     
     # Classification
-    status = models.CharField('Статус', max_length=20, choices=STATUS_CHOICES, default='ongoing')
-    type = models.CharField('Тип', max_length=20, choices=TYPE_CHOICES, default='tv')
+    status = models.SmallIntegerField('Статус', choices=Status.choices, default=Status.ONGOING, db_index=True)
+    type = models.SmallIntegerField('Тип', choices=Type.choices, default=Type.TV, db_index=True)
     genres = models.ManyToManyField(Genre, related_name='anime', verbose_name='Жанри')
     
     # Metadata
     year = models.IntegerField('Рік виходу')
-    season = models.CharField('Сезон', max_length=10, choices=SEASON_CHOICES, blank=True, null=True)
+    season = models.SmallIntegerField('Сезон', choices=Season.choices, blank=True, null=True, db_index=True)
     episodes_count = models.IntegerField('Кількість епізодів', default=0)
     rating = models.FloatField('Рейтинг', validators=[MinValueValidator(0), MaxValueValidator(10)], default=0)
     
@@ -118,48 +134,38 @@ class Anime(models.Model):
     last_images_update = models.DateTimeField('Останнє оновлення зображень', null=True, blank=True)
     update_failures = models.IntegerField('Кількість невдалих спроб', default=0)
     next_update_scheduled = models.DateTimeField('Наступне оновлення', null=True, blank=True)
+    data_hash = models.CharField('Хеш даних API', max_length=32, blank=True)
+    description_hash = models.CharField('Хеш джерела опису', max_length=32, blank=True)
+    
+    def _unique_slug(self, base_slug):
+        """Append a counter to base_slug until no other anime uses it"""
+        slug = base_slug
+        counter = 1
+        while Anime.objects.filter(slug=slug).exclude(pk=self.pk).exists():
+            slug = f"{base_slug[:245]}-{counter}"
+            counter += 1
+        return slug
     
     def save(self, *args, **kwargs):
-        # If migrating from old format to new, ensure poster_url contains a value
-        if not hasattr(self, 'poster_url'):
-            self.poster_url = ''
-            
-        if not hasattr(self, 'banner_url'):
-            self.banner_url = ''
-            
-        # If we have a poster image but no URL, try to get URL from the image
-        if not self.poster_url and self.poster and hasattr(self.poster, 'url'):
-            self.poster_url = self.poster.url
-            
-        # If we have a banner image but no URL, try to get URL from the image
-        if not self.banner_url and self.banner and hasattr(self.banner, 'url'):
-            self.banner_url = self.banner.url
-            
         # Fix for empty slug issue - ensure we always have a non-empty slug
-        if not self.slug or self.slug.strip() == '':
+        if (not self.slug or self.slug.strip() == '') and self.mal_id:
+            # Старі slug-и з лічильником ("title-1") можуть збігтися з "<назва>-<mal_id>",
+            # тож один exists() лишається; лічильник додається лише при збігу
+            self.slug = self._unique_slug(_fast_slug(self))
+        elif not self.slug or self.slug.strip() == '':
             if self.title_ukrainian and self.title_ukrainian.strip():
-                base_slug = slugify(self.title_ukrainian)
+                base_slug = slugify(self.title_ukrainian[:SLUG_SOURCE_LENGTH])
             elif self.title_english and self.title_english.strip():
-                base_slug = slugify(self.title_english)
+                base_slug = slugify(self.title_english[:SLUG_SOURCE_LENGTH])
             elif self.title_original and self.title_original.strip():
-                base_slug = slugify(self.title_original)
+                base_slug = slugify(self.title_original[:SLUG_SOURCE_LENGTH])
             else:
                 # As a last resort, use the ID or a timestamp if this is a new record
                 import time
                 base_slug = f"anime-{int(time.time())}"
                 
             # Ensure the slug is not too long (max 250 chars to be safe)
-            if len(base_slug) > 250:
-                base_slug = base_slug[:250]
-                
-            # Ensure the slug is unique by appending a counter if needed
-            original_slug = base_slug
-            counter = 1
-            while Anime.objects.filter(slug=base_slug).exclude(pk=self.pk).exists():
-                base_slug = f"{original_slug[:245]}-{counter}"
-                counter += 1
-                
-            self.slug = base_slug
+            self.slug = self._unique_slug(base_slug[:250])
 
         # Update priority if it hasn't been set manually
         if self.update_priority == 5 and 'update_fields' not in kwargs:
@@ -184,7 +190,7 @@ class Anime(models.Model):
         base_priority = 5  # Default medium priority
         
         # Ongoing anime get higher priority
-        if self.status == 'ongoing':
+        if self.status == Anime.Status.ONGOING:
             base_priority += 3
         
         # Recently updated anime get lower priority
@@ -211,9 +217,9 @@ class Anime(models.Model):
         base_days = 30  # Default: once a month
         
         # Adjust based on status
-        if self.status == 'ongoing':
+        if self.status == Anime.Status.ONGOING:
             base_days = 1  # Daily for ongoing
-        elif self.status == 'announced':
+        elif self.status == Anime.Status.ANNOUNCED:
             base_days = 7  # Weekly for announced
         
         # Adjust for priority (higher priority = more frequent updates)
@@ -327,6 +333,14 @@ class AnimeScreenshot(models.Model):
     class Meta:
         verbose_name = 'Скріншот'
         verbose_name_plural = 'Скріншоти'
+        constraints = [
+            # Один і той самий URL не повинен повторюватися для одного аніме
+            models.UniqueConstraint(
+                fields=['anime', 'image_url'],
+                condition=~models.Q(image_url=''),
+                name='unique_anime_screenshot_url',
+            ),
+        ]
 
 class UpdateStrategy(models.Model):
     """Configuration for update strategies"""
@@ -387,23 +401,26 @@ class APIUsageStatistics(models.Model):
     def __str__(self):
         return f"{self.api_name} - {self.requests_count} запитів"
     
-    def increment(self, success=True):
-        """Increment request counters"""
-        self.requests_count += 1
-        if success:
-            self.successful_requests += 1
-        else:
-            self.failed_requests += 1
+    def increment(self, successful=1, failed=0):
+        """Add successful and failed requests to the counters and save them"""
+        count = successful + failed
+        now = timezone.now()
+        self.requests_count += count
+        self.successful_requests += successful
+        self.failed_requests += failed
         
         # Handle daily count
-        if timezone.now().date() > self.daily_reset_at.date():
-            self.daily_count = 1
-            self.daily_reset_at = timezone.now()
+        if now.date() > self.daily_reset_at.date():
+            self.daily_count = count
+            self.daily_reset_at = now
         else:
-            self.daily_count += 1
+            self.daily_count += count
             
-        self.last_request_at = timezone.now()
-        self.save()
+        self.last_request_at = now
+        self.save(update_fields=[
+            'requests_count', 'successful_requests', 'failed_requests',
+            'daily_count', 'daily_reset_at', 'last_request_at',
+        ])
     
     def check_limits(self, strategy=None):
         """Check if API limits are exceeded"""
@@ -416,7 +433,7 @@ class APIUsageStatistics(models.Model):
         if self.daily_count >= strategy.api_requests_per_day:
             self.is_rate_limited = True
             self.rate_limited_until = timezone.now().replace(hour=0, minute=0, second=0) + datetime.timedelta(days=1)
-            self.save()
+            self.save(update_fields=['is_rate_limited', 'rate_limited_until'])
             return True
             
         # Check per-minute limit
@@ -429,7 +446,7 @@ class APIUsageStatistics(models.Model):
             if recent_count >= strategy.api_requests_per_minute:
                 self.is_rate_limited = True
                 self.rate_limited_until = timezone.now() + datetime.timedelta(minutes=1)
-                self.save()
+                self.save(update_fields=['is_rate_limited', 'rate_limited_until'])
                 return True
                 
         return False
@@ -1,22 +1,375 @@
 import requests
+import hashlib
+import inspect
 import logging
+import queue
+import random
+import threading
 import time
-import traceback
-from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import wraps
 
-from .api_rate_limiter import rate_limited
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .api_rate_limiter import APIRateLimiter, rate_limited
 
 # Set up dedicated logger with increased detail
 logger = logging.getLogger(__name__)
 
-class JikanAPIFetcher:
+# Швидший JSON-декодер, якщо встановлений
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# Час життя закешованих відповідей API (секунди)
+RESPONSE_CACHE_TTL = 60 * 60
+# Деталі аніме та списки епізодів змінюються рідше, ніж топи й сезонні списки
+DETAILS_CACHE_TTL = 60 * 60 * 24
+EPISODES_CACHE_TTL = 60 * 60 * 6
+# Застаріла копія віддається, якщо API тимчасово недоступне
+STALE_CACHE_TTL = 60 * 60 * 24
+
+
+def cached_response(ttl=RESPONSE_CACHE_TTL, is_valid=bool):
+    """
+    Decorator caching successful fetcher results in the Django cache
+    
+    A hit returns immediately, skipping the HTTP request, the retries and the
+    rate limiter. When a fetch fails (is_valid(result) is false, by default an
+    empty result) the last good copy is served for up to STALE_CACHE_TTL
+    after it expired.
+    
+    The key is built from the arguments bound to the function signature
+    (defaults applied, retries/delay dropped), so f(5) and f(5, 1, 3, 2)
+    share one cache entry.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            call_args = [
+                (name, value) for name, value in bound.arguments.items()
+                if name not in ('self', 'retries', 'delay')
+            ]
+            raw_key = f"{type(self).__name__}.{func.__name__}:{call_args!r}"
+            key = "api_response:" + hashlib.blake2b(raw_key.encode(), digest_size=16).hexdigest()
+            
+            result = cache.get(key)
+            if result is not None:
+                return result
+            
+            result = func(self, *args, **kwargs)
+            if is_valid(result):
+                cache.set(key, result, ttl)
+                cache.set(f"{key}:stale", result, ttl + STALE_CACHE_TTL)
+                return result
+            
+            stale = cache.get(f"{key}:stale")
+            if stale is not None:
+                logger.warning("Serving stale cached response for %s", func.__name__)
+                return stale
+            return result
+        
+        return wrapper
+    return decorator
+
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def coalesce_inflight(func):
+    """
+    Decorator sharing one in-flight request between concurrent identical calls
+    
+    While a call with the same arguments is running in another thread, later
+    callers wait for its result instead of sending a duplicate request.
+    """
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        key = (type(self).__name__, func.__name__, args, tuple(sorted(kwargs.items())))
+        with _inflight_lock:
+            future = _inflight.get(key)
+            owner = future is None
+            if owner:
+                future = _inflight[key] = Future()
+        
+        if not owner:
+            return future.result()
+        
+        try:
+            result = func(self, *args, **kwargs)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with _inflight_lock:
+                _inflight.pop(key, None)
+    
+    return wrapper
+
+
+# Верхня межа паузи між повторними спробами (секунди)
+MAX_BACKOFF = 30
+
+# Сезон Jikan для кожного місяця (індекс = місяць - 1)
+MONTH_TO_SEASON = ('winter',) * 3 + ('spring',) * 3 + ('summer',) * 3 + ('fall',) * 3
+
+# (connect, read) timeout for every API call; without it a stalled socket hangs the worker
+REQUEST_TIMEOUT = (5, 30)
+
+
+def backoff_delay(base, attempt):
+    """Exponential backoff with jitter for the given attempt number, capped at MAX_BACKOFF"""
+    return min(MAX_BACKOFF, base * 2 ** attempt * (1 + random.uniform(0, 0.5)))
+
+
+def build_session():
+    """
+    Create a requests session with a pooled keep-alive adapter
+    
+    urllib3 retries connection errors and 429/5xx responses with exponential
+    backoff, so the fetchers only handle malformed payloads themselves.
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=5,
+        backoff_factor=0.5,
+        backoff_jitter=0.5,
+        backoff_max=MAX_BACKOFF,
+        respect_retry_after_header=True,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET", "POST"],
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "User-Agent": "anime-db/1.0",
+        "Accept": "application/json",
+        "Accept-Encoding": "gzip, deflate",
+    })
+    return session
+
+
+_shared_sessions = {}
+_shared_sessions_lock = threading.Lock()
+
+
+def get_shared_session(name):
+    """
+    Return the process-wide session for an API, creating it on first use
+    
+    Fetchers are instantiated per task and per page; sharing the session keeps
+    the pooled keep-alive connections open across those instances.
+    """
+    with _shared_sessions_lock:
+        if name not in _shared_sessions:
+            _shared_sessions[name] = build_session()
+        return _shared_sessions[name]
+
+
+def parse_json(response):
+    """Decode a JSON response body, using orjson when it is installed"""
+    if not ORJSON_AVAILABLE:
+        return response.json()
+    try:
+        return orjson.loads(response.content)
+    except orjson.JSONDecodeError as e:
+        # Зберігаємо тип помилки requests, який перехоплюють fetcher-и
+        raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos)
+
+
+def fetch_concurrently(func, items, max_workers=3):
+    """
+    Call func(item) for every item in a bounded thread pool, preserving order
+    
+    The fetchers are I/O-bound, so threads let several HTTP round-trips overlap.
+    Worker threads may touch the ORM (rate limiter logs), so their DB
+    connections are closed once each call finishes.
+    """
+    def call(item):
+        try:
+            return func(item)
+        finally:
+            connection.close()
+    
+    items = list(items)
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(call, items))
+
+
+def prefetch_pages(fetch_page, max_pages, buffer_size=2):
+    """
+    Yield fetch_page(1..max_pages) results while the next page downloads
+    
+    A background thread keeps up to buffer_size pages ahead of the consumer,
+    so network waits overlap with the caller's DB work. Stops at the first
+    empty page.
+    """
+    pages = queue.Queue(maxsize=buffer_size)
+    done = object()
+    stop = threading.Event()
+    
+    def producer():
+        try:
+            for page in range(1, max_pages + 1):
+                if stop.is_set():
+                    break
+                data = fetch_page(page)
+                pages.put(data)
+                if not data:
+                    break
+        except Exception as e:
+            logger.error("Error prefetching page: %s", e)
+        finally:
+            connection.close()
+            pages.put(done)
+    
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
+    try:
+        while True:
+            data = pages.get()
+            if data is done or not data:
+                break
+            yield data
+    finally:
+        stop.set()
+        # Розблоковуємо producer, якщо він чекає на місце в черзі
+        while thread.is_alive():
+            try:
+                pages.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+class BaseAPIFetcher:
+    """Shared request handling for the API fetchers"""
+    SESSION_NAME = None
+    # Назва API у статистиці rate limiter'а
+    API_NAME = None
+    
+    def __init__(self):
+        self.session = get_shared_session(self.SESSION_NAME)
+    
+    def _request_json(self, method, url, extract, default, action, retries=3, delay=2, accept_statuses=(), **kwargs):
+        """
+        Send a request and return extract(response_json), or default on failure
+        
+        Transport errors and 429/5xx are retried by the session adapter; this
+        only retries responses whose body is not valid JSON, is not a JSON
+        object or lacks the expected data (extract raises KeyError/TypeError),
+        with exponential backoff. Error statuses listed in accept_statuses are
+        passed to extract instead of failing (for partial GraphQL results);
+        such a response is not retried.
+        """
+        kwargs.setdefault('timeout', REQUEST_TIMEOUT)
+        for attempt in range(retries):
+            try:
+                response = self.session.request(method, url, **kwargs)
+                if response.status_code not in accept_statuses:
+                    response.raise_for_status()
+            except requests.RequestException as e:
+                logger.error("Error %s: %s", action, e)
+                self._note_retry_after(getattr(e, 'response', None))
+                return default
+            
+            self._respect_rate_limit(response)
+            
+            try:
+                response_json = parse_json(response)
+            except requests.exceptions.JSONDecodeError as e:
+                # Обрізане або не-JSON тіло повторюємо так само, як відповідь без потрібних даних
+                logger.error("Malformed JSON response while %s: %s", action, e)
+            else:
+                if not isinstance(response_json, dict):
+                    # Список або null (наприклад, сторінка помилки) - така ж некоректна відповідь
+                    logger.error("Unexpected API response format while %s: %s", action, response_json)
+                else:
+                    logger.debug("Response status code: %s, keys: %s", response.status_code, response_json.keys())
+                    try:
+                        return extract(response_json)
+                    except (KeyError, TypeError):
+                        logger.error("Unexpected API response format while %s: %s", action, response_json)
+                        errors = response_json.get('errors') or response_json.get('error')
+                        if errors:
+                            logger.error("API Errors: %s", errors)
+            
+            if not response.ok:
+                # Прийнятий статус помилки без придатних даних - повтор нічого не змінить
+                return default
+            
+            if attempt < retries - 1:
+                wait = backoff_delay(delay, attempt)
+                logger.info("Retrying in %.1f seconds... (Attempt %s/%s)", wait, attempt+1, retries)
+                time.sleep(wait)
+        
+        return default
+    
+    def _respect_rate_limit(self, response):
+        """Pause until the rate-limit window resets when the API reports no requests left"""
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining = int(remaining)
+            wait = float(reset) - time.time()
+        except ValueError:
+            return
+        if remaining <= 1 and wait > 0:
+            # Other workers skip their requests until the reset instead of hitting a 429
+            self._mark_rate_limited(wait)
+            wait = min(wait, MAX_BACKOFF)
+            logger.info("Rate limit almost exhausted, waiting %.1f seconds", wait)
+            time.sleep(wait)
+    
+    def _note_retry_after(self, response):
+        """Record the server's Retry-After when a request finally failed with 429/503"""
+        if response is None or response.status_code not in (429, 503):
+            return
+        try:
+            wait = float(response.headers.get('Retry-After', ''))
+        except ValueError:
+            # Retry-After can also be an HTTP date; the retry adapter has already honoured it
+            return
+        if wait > 0:
+            self._mark_rate_limited(wait)
+    
+    def _mark_rate_limited(self, seconds):
+        if not self.API_NAME:
+            return
+        try:
+            APIRateLimiter.set_rate_limited_until(self.API_NAME, timezone.now() + timedelta(seconds=seconds))
+        except Exception as e:
+            logger.warning("Could not record rate limit for %s: %s", self.API_NAME, e)
+
+
+class JikanAPIFetcher(BaseAPIFetcher):
     """Service for fetching anime data from Jikan API (MyAnimeList)"""
     BASE_URL = "https://api.jikan.moe/v4"
     MAX_LIMIT = 25  # Додано константу для максимального ліміту
+    SESSION_NAME = "jikan"
+    API_NAME = "Jikan"
     
-    def __init__(self):
-        self.session = requests.Session()
-    
+    @cached_response()
     @rate_limited(api_name="Jikan")
     def fetch_top_anime(self, page=1, limit=25, retries=3, delay=2):
         """Fetch top anime from Jikan API"""
@@ -24,330 +377,161 @@ class JikanAPIFetcher:
         limit = min(limit, self.MAX_LIMIT)
         
         url = f"{self.BASE_URL}/top/anime?page={page}&limit={limit}"
-        logger.info(f"Fetching top anime from URL: {url}")
-        print(f"DEBUG: Requesting {url}")
+        logger.debug("Fetching top anime: page=%s limit=%s", page, limit)
         
-        for attempt in range(retries):
-            try:
-                response = self.session.get(url)
-                response.raise_for_status()
-                response_json = response.json()
-                
-                # Enhanced debugging output
-                logger.debug(f"Jikan API response structure: {list(response_json.keys())}")
-                logger.debug(f"Response status code: {response.status_code}")
-                logger.debug(f"Response headers: {response.headers}")
-                
-                if 'data' not in response_json:
-                    logger.error(f"Unexpected API response format. Keys: {list(response_json.keys())}")
-                    logger.error(f"Full response: {response_json}")
-                    if 'error' in response_json:
-                        logger.error(f"API Error: {response_json['error']}")
-                    
-                    # If this is not the last retry, wait and try again
-                    if attempt < retries - 1:
-                        logger.info(f"Retrying in {delay} seconds... (Attempt {attempt+1}/{retries})")
-                        time.sleep(delay)
-                        continue
-                    return []
-                
-                return response_json['data']
-            except requests.RequestException as e:
-                logger.error(f"Error fetching top anime: {str(e)}")
-                logger.error(f"Exception details: {traceback.format_exc()}")
-                if attempt < retries - 1:
-                    logger.info(f"Retrying in {delay} seconds... (Attempt {attempt+1}/{retries})")
-                    time.sleep(delay)
-                else:
-                    return []
+        return self._request_json(
+            'GET', url, lambda data: data['data'], [],
+            "fetching top anime", retries=retries, delay=delay,
+        )
     
+    def iter_top_anime_pages(self, max_pages=40, limit=25):
+        """Yield pages of top anime, prefetching the next page in the background"""
+        return prefetch_pages(lambda page: self.fetch_top_anime(page=page, limit=limit), max_pages)
+    
+    @cached_response()
     def fetch_seasonal_anime(self, year=None, season=None, retries=3, delay=2):
         """Fetch seasonal anime from Jikan API"""
         # Default to current season if not specified
         if not year or not season:
-            current_month = datetime.now().month
-            year = datetime.now().year
-            
-            # Map month to season
-            if 1 <= current_month <= 3:
-                season = 'winter'
-            elif 4 <= current_month <= 6:
-                season = 'spring'
-            elif 7 <= current_month <= 9:
-                season = 'summer'
-            else:
-                season = 'fall'
+            now = datetime.now()
+            year, season = now.year, MONTH_TO_SEASON[now.month - 1]
         
         url = f"{self.BASE_URL}/seasons/{year}/{season}"
         
-        for attempt in range(retries):
-            try:
-                response = self.session.get(url)
-                response.raise_for_status()
-                response_json = response.json()
-                
-                # Log the response structure for debugging
-                logger.debug(f"Jikan API seasonal response structure: {list(response_json.keys())}")
-                
-                if 'data' not in response_json:
-                    logger.error(f"Unexpected API response format. Keys: {list(response_json.keys())}")
-                    if 'error' in response_json:
-                        logger.error(f"API Error: {response_json['error']}")
-                    
-                    if attempt < retries - 1:
-                        logger.info(f"Retrying in {delay} seconds... (Attempt {attempt+1}/{retries})")
-                        time.sleep(delay)
-                        continue
-                    return []
-                
-                return response_json['data']
-            except requests.RequestException as e:
-                logger.error(f"Error fetching seasonal anime: {str(e)}")
-                if attempt < retries - 1:
-                    logger.info(f"Retrying in {delay} seconds... (Attempt {attempt+1}/{retries})")
-                    time.sleep(delay)
-                else:
-                    return []
+        return self._request_json(
+            'GET', url, lambda data: data['data'], [],
+            "fetching seasonal anime", retries=retries, delay=delay,
+        )
     
+    @cached_response(ttl=DETAILS_CACHE_TTL)
+    @coalesce_inflight
+    @rate_limited(api_name="Jikan")
     def fetch_anime_details(self, mal_id, retries=3, delay=2):
         """Fetch detailed information about a specific anime"""
         url = f"{self.BASE_URL}/anime/{mal_id}/full"
         
-        for attempt in range(retries):
-            try:
-                response = self.session.get(url)
-                response.raise_for_status()
-                response_json = response.json()
-                
-                # Log the response structure for debugging
-                logger.debug(f"Jikan API details response structure: {list(response_json.keys())}")
-                
-                if 'data' not in response_json:
-                    logger.error(f"Unexpected API response format. Keys: {list(response_json.keys())}")
-                    if 'error' in response_json:
-                        logger.error(f"API Error: {response_json['error']}")
-                    
-                    if attempt < retries - 1:
-                        logger.info(f"Retrying in {delay} seconds... (Attempt {attempt+1}/{retries})")
-                        time.sleep(delay)
-                        continue
-                    return None
-                
-                return response_json['data']
-            except requests.RequestException as e:
-                logger.error(f"Error fetching anime details for ID {mal_id}: {str(e)}")
-                if attempt < retries - 1:
-                    logger.info(f"Retrying in {delay} seconds... (Attempt {attempt+1}/{retries})")
-                    time.sleep(delay)
-                else:
-                    return None
+        return self._request_json(
+            'GET', url, lambda data: data['data'], None,
+            f"fetching anime details for ID {mal_id}", retries=retries, delay=delay,
+        )
+    
+    def fetch_anime_details_many(self, mal_ids, max_workers=3):
+        """Fetch details for several anime concurrently; cache misses are still paced by the rate limiter"""
+        return fetch_concurrently(self.fetch_anime_details, mal_ids, max_workers=max_workers)
     
+    @cached_response(ttl=EPISODES_CACHE_TTL, is_valid=lambda result: bool(result[0]))
+    @rate_limited(api_name="Jikan")
     def fetch_anime_episodes(self, mal_id, page=1, retries=3, delay=2):
         """Fetch episodes for a specific anime from Jikan API"""
         url = f"{self.BASE_URL}/anime/{mal_id}/episodes?page={page}"
-        logger.info(f"Fetching episodes for anime ID {mal_id} from URL: {url}")
+        logger.debug("Fetching episodes for anime ID %s from URL: %s", mal_id, url)
         
-        for attempt in range(retries):
-            try:
-                response = self.session.get(url)
-                response.raise_for_status()
-                response_json = response.json()
-                
-                # Enhanced debugging output
-                logger.debug(f"Jikan API episodes response structure: {list(response_json.keys())}")
-                
-                if 'data' not in response_json:
-                    logger.error(f"Unexpected API response format for episodes. Keys: {list(response_json.keys())}")
-                    if 'error' in response_json:
-                        logger.error(f"API Error: {response_json['error']}")
-                    
-                    if attempt < retries - 1:
-                        logger.info(f"Retrying in {delay} seconds... (Attempt {attempt+1}/{retries})")
-                        time.sleep(delay)
-                        continue
-                    return [], None
-                
-                # Get pagination info for potential future requests
-                pagination = response_json.get('pagination', {})
-                has_next_page = pagination.get('has_next_page', False)
-                
-                return response_json['data'], pagination
-                
-            except requests.RequestException as e:
-                logger.error(f"Error fetching episodes for anime ID {mal_id}: {str(e)}")
-                if attempt < retries - 1:
-                    logger.info(f"Retrying in {delay} seconds... (Attempt {attempt+1}/{retries})")
-                    time.sleep(delay)
-                else:
-                    return [], None
+        # Pagination info is returned for the follow-up page requests
+        return self._request_json(
+            'GET', url, lambda data: (data['data'], data.get('pagination', {})), ([], None),
+            f"fetching episodes for anime ID {mal_id}", retries=retries, delay=delay,
+        )
     
-    def fetch_all_anime_episodes(self, mal_id, max_pages=3, retries=3, delay=2):
-        """Fetch all episodes for a specific anime by making multiple paginated requests"""
-        all_episodes = []
-        page = 1
+    def fetch_all_anime_episodes(self, mal_id, max_pages=3, retries=3, delay=2, max_workers=3):
+        """
+        Fetch all episodes for a specific anime by making multiple paginated requests
         
-        while page <= max_pages:
-            episodes, pagination = self.fetch_anime_episodes(mal_id, page, retries, delay)
-            all_episodes.extend(episodes)
-            
-            if not pagination or not pagination.get('has_next_page', False):
-                break
-                
-            page += 1
-            # Add a small delay between requests to avoid rate limiting
-            time.sleep(1)
+        The first page reports how many pages exist; the remaining ones (up to
+        max_pages) are then requested concurrently, each page still waiting for
+        its rate limiter slot.
+        """
+        all_episodes, pagination = self.fetch_anime_episodes(mal_id, 1, retries, delay)
+        all_episodes = list(all_episodes)
         
-        logger.info(f"Fetched {len(all_episodes)} episodes for anime ID {mal_id}")
+        if pagination and pagination.get('has_next_page', False):
+            last_page = min(pagination.get('last_visible_page') or max_pages, max_pages)
+            pages = fetch_concurrently(
+                lambda page: self.fetch_anime_episodes(mal_id, page, retries, delay)[0],
+                range(2, last_page + 1),
+                max_workers=max_workers,
+            )
+            for episodes in pages:
+                all_episodes.extend(episodes)
+        
+        logger.debug("Fetched %s episodes for anime ID %s", len(all_episodes), mal_id)
         return all_episodes
 
 
-class AnilistAPIFetcher:
+class AnilistAPIFetcher(BaseAPIFetcher):
     """Service for fetching anime data from Anilist API"""
     API_URL = "https://graphql.anilist.co"
     
-    @rate_limited(api_name="Anilist")
-    def fetch_popular_anime(self, page=1, per_page=25, retries=3, delay=2):
-        """Fetch popular anime from Anilist"""
-        query = '''
+    # Максимум Media-аліасів (пошук за MAL ID) в одному запиті
+    MAX_BATCH_IDS = 25
+    
+    # Згенеровані запити за кількістю аліасів, щоб не будувати рядок щоразу
+    _by_ids_queries = {}
+    # Серіалізований початок JSON-тіла для кожного тексту запиту
+    _payload_prefixes = {}
+    
+    MEDIA_FIELDS_FRAGMENT = '''
+        fragment MediaFields on Media {
+            id
+            idMal
+            title {
+                romaji
+                english
+                native
+            }
+            description
+            coverImage {
+                extraLarge
+                large
+                medium
+                color
+            }
+            bannerImage
+            format
+            status
+            episodes
+            duration
+            seasonYear
+            season
+            averageScore
+            popularity
+            genres
+            tags {
+                name
+                description
+            }
+            streamingEpisodes {
+                title
+                thumbnail
+                url
+                site
+            }
+            trailer {
+                id
+                site
+                thumbnail
+            }
+            nextAiringEpisode {
+                airingAt
+                timeUntilAiring
+                episode
+            }
+        }
+        '''
+    
+    POPULAR_QUERY = '''
         query ($page: Int, $perPage: Int) {
             Page(page: $page, perPage: $perPage) {
                 media(sort: POPULARITY_DESC, type: ANIME) {
-                    id
-                    idMal
-                    title {
-                        romaji
-                        english
-                        native
-                    }
-                    description
-                    coverImage {
-                        extraLarge
-                        large
-                        medium
-                        color
-                    }
-                    bannerImage
-                    format
-                    status
-                    episodes
-                    duration
-                    seasonYear
-                    season
-                    averageScore
-                    popularity
-                    genres
-                    tags {
-                        name
-                        description
-                    }
-                    streamingEpisodes {
-                        title
-                        thumbnail
-                        url
-                        site
-                    }
-                    trailer {
-                        id
-                        site
-                        thumbnail
-                    }
-                    nextAiringEpisode {
-                        airingAt
-                        timeUntilAiring
-                        episode
-                    }
+                    ...MediaFields
                 }
             }
         }
-        '''
-        
-        variables = {
-            'page': page,
-            'perPage': per_page
-        }
-        
-        for attempt in range(retries):
-            try:
-                response = requests.post(
-                    self.API_URL,
-                    json={'query': query, 'variables': variables}
-                )
-                response.raise_for_status()
-                response_json = response.json()
-                
-                # Log the response structure
-                logger.debug(f"Anilist API response structure: {list(response_json.keys())}")
-                
-                if 'data' not in response_json or 'Page' not in response_json['data'] or 'media' not in response_json['data']['Page']:
-                    logger.error(f"Unexpected Anilist API response format: {response_json}")
-                    if 'errors' in response_json:
-                        logger.error(f"API Errors: {response_json['errors']}")
-                    
-                    if attempt < retries - 1:
-                        logger.info(f"Retrying in {delay} seconds... (Attempt {attempt+1}/{retries})")
-                        time.sleep(delay)
-                        continue
-                    return []
-                
-                return response_json['data']['Page']['media']
-            except requests.RequestException as e:
-                logger.error(f"Error fetching anime from Anilist: {str(e)}")
-                if attempt < retries - 1:
-                    logger.info(f"Retrying in {delay} seconds... (Attempt {attempt+1}/{retries})")
-                    time.sleep(delay)
-                else:
-                    return []
-
-    @rate_limited(api_name="Anilist")
-    def fetch_anime_by_id(self, id_mal, retries=3, delay=2):
-        """Fetch anime from Anilist by MyAnimeList ID"""
-        query = '''
+        ''' + MEDIA_FIELDS_FRAGMENT
+    
+    ANIME_BY_ID_QUERY = '''
         query ($idMal: Int) {
             Media(idMal: $idMal, type: ANIME) {
-                id
-                idMal
-                title {
-                    romaji
-                    english
-                    native
-                }
-                description
-                coverImage {
-                    extraLarge
-                    large
-                    medium
-                    color
-                }
-                bannerImage
-                format
-                status
-                episodes
-                duration
-                seasonYear
-                season
-                averageScore
-                popularity
-                genres
-                tags {
-                    name
-                    description
-                }
-                streamingEpisodes {
-                    title
-                    thumbnail
-                    url
-                    site
-                }
-                nextAiringEpisode {
-                    airingAt
-                    timeUntilAiring
-                    episode
-                }
-                trailer {
-                    id
-                    site
-                    thumbnail
-                }
+                ...MediaFields
                 airingSchedule {
                     nodes {
                         episode
@@ -357,44 +541,9 @@ class AnilistAPIFetcher:
                 }
             }
         }
-        '''
-        
-        variables = {
-            'idMal': id_mal
-        }
-        
-        for attempt in range(retries):
-            try:
-                response = requests.post(
-                    self.API_URL,
-                    json={'query': query, 'variables': variables}
-                )
-                response.raise_for_status()
-                response_json = response.json()
-                
-                if 'data' not in response_json or 'Media' not in response_json['data']:
-                    logger.error(f"Unexpected Anilist API response format for MAL ID {id_mal}: {response_json}")
-                    if 'errors' in response_json:
-                        logger.error(f"API Errors: {response_json['errors']}")
-                    
-                    if attempt < retries - 1:
-                        logger.info(f"Retrying in {delay} seconds... (Attempt {attempt+1}/{retries})")
-                        time.sleep(delay)
-                        continue
-                    return None
-                
-                return response_json['data']['Media']
-            except requests.RequestException as e:
-                logger.error(f"Error fetching anime from Anilist by MAL ID {id_mal}: {str(e)}")
-                if attempt < retries - 1:
-                    logger.info(f"Retrying in {delay} seconds... (Attempt {attempt+1}/{retries})")
-                    time.sleep(delay)
-                else:
-                    return None
-
-    def fetch_anime_episodes(self, anilist_id, retries=3, delay=2):
-        """Fetch episodes for a specific anime from Anilist API"""
-        query = '''
+        ''' + MEDIA_FIELDS_FRAGMENT
+    
+    EPISODES_QUERY = '''
         query ($id: Int) {
             Media(id: $id, type: ANIME) {
                 id
@@ -425,36 +574,123 @@ class AnilistAPIFetcher:
             }
         }
         '''
+    
+    SESSION_NAME = "anilist"
+    API_NAME = "Anilist"
+    
+    def _post_graphql(self, query, variables, extract, default, action, retries=3, delay=2, accept_statuses=()):
+        """Send a GraphQL query to Anilist and return extract(response_json)"""
+        if not ORJSON_AVAILABLE:
+            return self._request_json(
+                'POST', self.API_URL, extract, default, action,
+                retries=retries, delay=delay, accept_statuses=accept_statuses,
+                json={'query': query, 'variables': variables},
+            )
+        # Запит серіалізується один раз; на кожен виклик кодуються лише змінні
+        prefix = self._payload_prefixes.get(query)
+        if prefix is None:
+            prefix = self._payload_prefixes[query] = orjson.dumps({'query': query})[:-1] + b',"variables":'
+        return self._request_json(
+            'POST', self.API_URL, extract, default, action,
+            retries=retries, delay=delay, accept_statuses=accept_statuses,
+            data=prefix + orjson.dumps(variables) + b'}',
+            headers={'Content-Type': 'application/json'},
+        )
+    
+    @cached_response()
+    @rate_limited(api_name="Anilist")
+    def fetch_popular_anime(self, page=1, per_page=25, retries=3, delay=2):
+        """Fetch popular anime from Anilist"""
+        variables = {
+            'page': page,
+            'perPage': per_page
+        }
+        
+        return self._post_graphql(
+            self.POPULAR_QUERY, variables, lambda data: data['data']['Page']['media'], [],
+            "fetching anime from Anilist", retries=retries, delay=delay,
+        )
+
+    @cached_response(ttl=DETAILS_CACHE_TTL)
+    @coalesce_inflight
+    @rate_limited(api_name="Anilist")
+    def fetch_anime_by_id(self, id_mal, retries=3, delay=2):
+        """Fetch anime from Anilist by MyAnimeList ID"""
+        variables = {
+            'idMal': id_mal
+        }
+        
+        return self._post_graphql(
+            self.ANIME_BY_ID_QUERY, variables, lambda data: data['data']['Media'], None,
+            f"fetching anime from Anilist by MAL ID {id_mal}", retries=retries, delay=delay,
+        )
+
+    def fetch_anime_by_id_many(self, id_mals, max_workers=5):
+        """Fetch several anime by MAL ID concurrently"""
+        return fetch_concurrently(self.fetch_anime_by_id, id_mals, max_workers=max_workers)
+    
+    def fetch_anime_by_ids(self, id_mals):
+        """
+        Fetch anime by MAL ID, up to MAX_BATCH_IDS per aliased GraphQL request
         
+        Returns a list aligned with id_mals, with None where Anilist has no match.
+        When one alias is unknown Anilist answers 404 but still returns the
+        other aliases' data; only the aliases left null are then fetched
+        individually (concurrently). A batch that fails outright is fetched
+        individually as a whole.
+        """
+        id_mals = list(id_mals)
+        results = []
+        for i in range(0, len(id_mals), self.MAX_BATCH_IDS):
+            chunk = tuple(id_mals[i:i + self.MAX_BATCH_IDS])
+            batch = self._fetch_anime_by_ids_batch(chunk) if len(chunk) > 1 else None
+            if batch is None:
+                batch = self.fetch_anime_by_id_many(chunk)
+            else:
+                batch = list(batch)
+                missing = [index for index, entry in enumerate(batch) if entry is None]
+                if missing:
+                    fetched = self.fetch_anime_by_id_many([chunk[index] for index in missing])
+                    for index, entry in zip(missing, fetched):
+                        batch[index] = entry
+            results.extend(batch)
+        return results
+    
+    @classmethod
+    def _by_ids_query(cls, count):
+        query = cls._by_ids_queries.get(count)
+        if query is None:
+            variable_defs = ", ".join(f"$m{i}: Int" for i in range(count))
+            media_fields = "\n".join(
+                f"m{i}: Media(idMal: $m{i}, type: ANIME) {{ ...MediaFields airingSchedule {{ nodes {{ episode airingAt timeUntilAiring }} }} }}"
+                for i in range(count)
+            )
+            query = f"query ({variable_defs}) {{\n{media_fields}\n}}" + cls.MEDIA_FIELDS_FRAGMENT
+            cls._by_ids_queries[count] = query
+        return query
+    
+    @cached_response(ttl=DETAILS_CACHE_TTL)
+    @rate_limited(api_name="Anilist")
+    def _fetch_anime_by_ids_batch(self, id_mals, retries=3, delay=2):
+        """Fetch a batch of anime by MAL ID as aliased Media fields in a single request"""
+        variables = {f"m{i}": id_mal for i, id_mal in enumerate(id_mals)}
+        
+        # 404 означає, що частину аліасів не знайдено; решта даних приходить у тій же відповіді
+        return self._post_graphql(
+            self._by_ids_query(len(id_mals)), variables,
+            lambda data: [data['data'][f"m{i}"] for i in range(len(id_mals))], None,
+            f"fetching {len(id_mals)} anime from Anilist by MAL ID", retries=retries, delay=delay,
+            accept_statuses=(404,),
+        )
+    
+    @cached_response(ttl=EPISODES_CACHE_TTL)
+    def fetch_anime_episodes(self, anilist_id, retries=3, delay=2):
+        """Fetch episodes for a specific anime from Anilist API"""
         variables = {
             'id': anilist_id
         }
         
-        for attempt in range(retries):
-            try:
-                response = requests.post(
-                    self.API_URL,
-                    json={'query': query, 'variables': variables}
-                )
-                response.raise_for_status()
-                response_json = response.json()
-                
-                if 'data' not in response_json or 'Media' not in response_json['data']:
-                    logger.error(f"Unexpected Anilist API response format for ID {anilist_id}: {response_json}")
-                    if 'errors' in response_json:
-                        logger.error(f"API Errors: {response_json['errors']}")
-                    
-                    if attempt < retries - 1:
-                        logger.info(f"Retrying in {delay} seconds... (Attempt {attempt+1}/{retries})")
-                        time.sleep(delay)
-                        continue
-                    return None
-                
-                return response_json['data']['Media']
-            except requests.RequestException as e:
-                logger.error(f"Error fetching episodes from Anilist by ID {anilist_id}: {str(e)}")
-                if attempt < retries - 1:
-                    logger.info(f"Retrying in {delay} seconds... (Attempt {attempt+1}/{retries})")
-                    time.sleep(delay)
-                else:
-                    return None
+        return self._post_graphql(
+            self.EPISODES_QUERY, variables, lambda data: data['data']['Media'], None,
+            f"fetching episodes from Anilist by ID {anilist_id}", retries=retries, delay=delay,
+        )
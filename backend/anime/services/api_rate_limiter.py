@@ -1,39 +1,166 @@
+import atexit
+import queue
+import threading
 import time
 import logging
-import random
+from collections import defaultdict
 from functools import wraps
 from datetime import datetime, timedelta
 
+from django.db import connection
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.utils import timezone
 from ..models import APIUsageStatistics, APIRequestLog, UpdateStrategy
 
 logger = logging.getLogger(__name__)
 
+# Логи запитів пишуться у БД пакетами фоновим потоком, а не на кожен виклик API
+LOG_BATCH_SIZE = 500
+LOG_FLUSH_INTERVAL = 1.0
+
+# Скільки секунд процес довіряє закешованим статистиці та стратегії
+STATS_CACHE_TTL = 30
+STRATEGY_CACHE_TTL = 60
+
+# api_name -> (APIUsageStatistics, time.monotonic() завантаження)
+_stats_cache = {}
+# (UpdateStrategy або None, time.monotonic() завантаження)
+_strategy_cache = None
+
+# Скільки секунд вважати дійсною останню успішну перевірку лімітів
+LIMIT_CHECK_TTL = 5
+# api_name -> time.monotonic() останньої перевірки, що не знайшла перевищення
+_limit_checks = {}
+
+# Мінімальний інтервал між запитами, якщо активної стратегії немає (секунди)
+DEFAULT_REQUEST_INTERVAL = 2.0
+
+# Час (time.monotonic), раніше якого не можна слати наступний запит до API
+_next_slot = {}
+_next_slot_lock = threading.Lock()
+
+_log_queue = queue.SimpleQueue()
+_log_worker = None
+_log_worker_lock = threading.Lock()
+
+
+def _drain_log_queue(max_items, timeout=None):
+    """Take up to max_items queued log entries, waiting up to timeout for the first one"""
+    batch = []
+    try:
+        batch.append(_log_queue.get(timeout=timeout) if timeout else _log_queue.get_nowait())
+        while len(batch) < max_items:
+            batch.append(_log_queue.get_nowait())
+    except queue.Empty:
+        pass
+    return batch
+
+
+def _write_log_batch(batch):
+    """Insert a batch of APIRequestLog rows and apply their counters with one save per API"""
+    try:
+        APIRequestLog.objects.bulk_create(batch, batch_size=LOG_BATCH_SIZE)
+        
+        counts = defaultdict(lambda: [0, 0])
+        for entry in batch:
+            counts[entry.api_name][0 if entry.success else 1] += 1
+        
+        for api_name, (successful, failed) in counts.items():
+            APIRateLimiter.get_api_stats(api_name, fresh=True).increment(successful, failed)
+    except Exception as e:
+        logger.error("Failed to write %s API request logs: %s", len(batch), e)
+
+
+def _log_worker_loop():
+    while True:
+        batch = _drain_log_queue(LOG_BATCH_SIZE, timeout=LOG_FLUSH_INTERVAL)
+        if batch:
+            try:
+                _write_log_batch(batch)
+            finally:
+                connection.close()
+
+
+def _ensure_log_worker():
+    """
+    Start the log writer thread on first use
+    
+    Started lazily rather than at import or in AppConfig.ready(), so each
+    forked Celery worker process gets its own thread.
+    """
+    global _log_worker
+    if _log_worker is not None and _log_worker.is_alive():
+        return
+    with _log_worker_lock:
+        if _log_worker is None or not _log_worker.is_alive():
+            _log_worker = threading.Thread(target=_log_worker_loop, name="api-request-log", daemon=True)
+            _log_worker.start()
+
+
+def flush_request_logs():
+    """Write every queued API request log synchronously; also runs at interpreter exit"""
+    while True:
+        batch = _drain_log_queue(LOG_BATCH_SIZE)
+        if not batch:
+            return
+        _write_log_batch(batch)
+
+
+atexit.register(flush_request_logs)
+
 class APIRateLimiter:
     """Service for managing API request rates and preventing rate limit issues"""
     
     @staticmethod
-    def get_api_stats(api_name):
-        """Get or create API usage statistics"""
+    def get_api_stats(api_name, fresh=False):
+        """
+        Get or create API usage statistics
+        
+        The row is cached in-process for STATS_CACHE_TTL seconds; pass
+        fresh=True to read it from the database (e.g. before updating counters).
+        """
+        entry = _stats_cache.get(api_name)
+        if not fresh and entry and time.monotonic() - entry[1] < STATS_CACHE_TTL:
+            return entry[0]
         stats, _ = APIUsageStatistics.objects.get_or_create(api_name=api_name)
+        _stats_cache[api_name] = (stats, time.monotonic())
         return stats
     
+    @staticmethod
+    def get_active_strategy():
+        """Return the active UpdateStrategy (or None), cached for STRATEGY_CACHE_TTL seconds"""
+        global _strategy_cache
+        entry = _strategy_cache
+        if entry and time.monotonic() - entry[1] < STRATEGY_CACHE_TTL:
+            return entry[0]
+        strategy = UpdateStrategy.objects.filter(is_active=True).first()
+        _strategy_cache = (strategy, time.monotonic())
+        return strategy
+    
     @staticmethod
     def log_request(api_name, endpoint, parameters=None, response_code=None, success=False, error_message=""):
-        """Log API request details"""
-        # Update statistics
-        stats = APIRateLimiter.get_api_stats(api_name)
-        stats.increment(success=success)
-        
-        # Create detailed log
-        APIRequestLog.objects.create(
+        """Queue API request details; rows and counters are written in batches in the background"""
+        # created_at is auto_now_add, so it is stamped when the batch is inserted
+        _log_queue.put(APIRequestLog(
             api_name=api_name,
             endpoint=endpoint,
             parameters=parameters,
             response_code=response_code,
             success=success,
             error_message=error_message
-        )
+        ))
+        _ensure_log_worker()
+    
+    @staticmethod
+    def set_rate_limited_until(api_name, until):
+        """Mark the API as rate-limited until the given time, as reported by the server"""
+        stats = APIRateLimiter.get_api_stats(api_name)
+        if stats.is_rate_limited and stats.rate_limited_until and stats.rate_limited_until >= until:
+            return
+        stats.is_rate_limited = True
+        stats.rate_limited_until = until
+        stats.save(update_fields=['is_rate_limited', 'rate_limited_until'])
     
     @staticmethod
     def check_rate_limit(api_name):
@@ -45,29 +172,40 @@ class APIRateLimiter:
             if timezone.now() > stats.rate_limited_until:
                 stats.is_rate_limited = False
                 stats.rate_limited_until = None
-                stats.save()
+                stats.save(update_fields=['is_rate_limited', 'rate_limited_until'])
                 return False
             return True
             
+        # A recent passing check is reused: calls are already paced by reserve_slot,
+        # so re-counting the last minute's requests on every call adds nothing
+        checked_at = _limit_checks.get(api_name)
+        if checked_at is not None and time.monotonic() - checked_at < LIMIT_CHECK_TTL:
+            return False
+        
         # Check against limits
-        return stats.check_limits()
+        limited = stats.check_limits(APIRateLimiter.get_active_strategy())
+        if not limited:
+            _limit_checks[api_name] = time.monotonic()
+        return limited
     
     @staticmethod
     def adaptive_wait(api_name):
-        """Calculate adaptive wait time based on API usage pattern"""
+        """
+        Minimum interval between two calls to the API, in seconds
+        
+        It is the strategy's per-minute rate, stretched once daily usage
+        passes 50% of the quota.
+        """
         stats = APIRateLimiter.get_api_stats(api_name)
-        strategy = UpdateStrategy.objects.filter(is_active=True).first()
+        strategy = APIRateLimiter.get_active_strategy()
         
         if not strategy:
-            # Default conservative wait
-            return random.uniform(1.0, 3.0)
+            # Default conservative interval
+            return DEFAULT_REQUEST_INTERVAL
         
-        # Base wait time
+        # Base interval
         base_wait = 60 / strategy.api_requests_per_minute
         
-        # Add jitter to prevent synchronized requests
-        jitter = random.uniform(-0.3, 0.3) * base_wait
-        
         # Calculate usage percentage
         daily_usage_percent = (stats.daily_count / strategy.api_requests_per_day) * 100
         
@@ -82,10 +220,36 @@ class APIRateLimiter:
         else:
             backoff_factor = 1.0
         
-        wait_time = (base_wait * backoff_factor) + jitter
+        return base_wait * backoff_factor
+    
+    @staticmethod
+    def reserve_slot(api_name):
+        """
+        Wait only as long as needed to keep calls adaptive_wait() apart
         
-        # Ensure minimum wait time
-        return max(0.5, wait_time)
+        Calls that are already spaced out (cache hits in between, other
+        endpoints) go straight through instead of always sleeping.
+        """
+        interval = APIRateLimiter.adaptive_wait(api_name)
+        with _next_slot_lock:
+            now = time.monotonic()
+            start = max(now, _next_slot.get(api_name, 0.0))
+            _next_slot[api_name] = start + interval
+        wait = start - now
+        if wait > 0:
+            time.sleep(wait)
+
+@receiver(post_save, sender=APIUsageStatistics)
+def _refresh_cached_stats(sender, instance, **kwargs):
+    """Keep this process's cached statistics in step with saved changes"""
+    _stats_cache[instance.api_name] = (instance, time.monotonic())
+
+
+@receiver(post_save, sender=UpdateStrategy)
+def _reset_cached_strategy(sender, **kwargs):
+    global _strategy_cache
+    _strategy_cache = None
+
 
 def rate_limited(api_name):
     """Decorator for rate-limiting API calls"""
@@ -96,7 +260,7 @@ def rate_limited(api_name):
             if APIRateLimiter.check_rate_limit(api_name):
                 stats = APIRateLimiter.get_api_stats(api_name)
                 wait_remaining = (stats.rate_limited_until - timezone.now()).total_seconds()
-                logger.warning(f"{api_name} is currently rate-limited. Waiting for {wait_remaining:.1f} seconds")
+                logger.warning("%s is currently rate-limited. Waiting for %.1f seconds", api_name, wait_remaining)
                 
                 # If it's a short wait, we can wait it out
                 if wait_remaining < 120:  # 2 minutes
@@ -104,9 +268,8 @@ def rate_limited(api_name):
                 else:
                     raise Exception(f"{api_name} is rate-limited for too long ({wait_remaining:.1f}s). Skipping request.")
             
-            # Calculate adaptive wait time
-            wait_time = APIRateLimiter.adaptive_wait(api_name)
-            time.sleep(wait_time)
+            # Keep calls at least the adaptive interval apart
+            APIRateLimiter.reserve_slot(api_name)
             
             # Get endpoint from kwargs if available
             endpoint = kwargs.get('endpoint', func.__name__)
@@ -1,19 +1,85 @@
+import hashlib
+import json
 import logging
-import traceback
 import re
 from datetime import datetime
+from types import MappingProxyType
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.text import slugify
-from django.db import models
 
 from anime.models import Anime, Genre
 from .translation_service import TranslationService
-from .api_fetchers import JikanAPIFetcher, AnilistAPIFetcher
+from .api_fetchers import JikanAPIFetcher, AnilistAPIFetcher, fetch_concurrently
 from .image_service import ImageService
 from .episode_service import EpisodeService
 
 # Set up dedicated logger with increased detail
 logger = logging.getLogger(__name__)
 
+# Символи, які видаляються з не-японських назв
+_TITLE_CLEAN_RE = re.compile(r'[^\w\s\-_.,:;()\[\]{}]')
+
+# Кана та ієрогліфи CJK - ознака японської назви
+_CJK_RE = re.compile('[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff]')
+
+# Кількість хвилин у рядку тривалості на зразок "24 min per ep"
+_DURATION_RE = re.compile(r'(\d+)')
+
+# ID відео з посилань youtube.com/watch?v=..., youtu.be/... та youtube.com/embed/...
+_YT_ID_RE = re.compile(r'(?:[?&]v=|youtu\.be/|/embed/)([A-Za-z0-9_-]{11})')
+
+# Поля відповідей API, які впливають на збережені дані; лічильники на зразок
+# members/favorites змінюються щодня і не повинні вважатися зміною
+_JIKAN_HASH_KEYS = (
+    'title', 'title_english', 'title_japanese', 'titles', 'synopsis', 'background',
+    'year', 'episodes', 'score', 'trailer', 'status', 'type', 'season', 'images',
+    'duration', 'genres', 'themes', 'demographics',
+)
+_ANILIST_HASH_KEYS = (
+    'title', 'description', 'seasonYear', 'episodes', 'averageScore', 'season',
+    'trailer', 'status', 'format', 'coverImage', 'bannerImage', 'genres', 'tags',
+    'streamingEpisodes',
+)
+
+# Кеш {назва жанру: id} на один запуск імпорту (warm_genre_cache перезавантажує його);
+# жанрів лише кілька десятків
+_GENRE_ID_CACHE = {}
+
+# Відповідність статусів і типів API значенням моделі
+JIKAN_STATUS_MAP = MappingProxyType({
+    'Airing': Anime.Status.ONGOING,
+    'Currently Airing': Anime.Status.ONGOING,
+    'Finished Airing': Anime.Status.COMPLETED,
+    'Not yet aired': Anime.Status.ANNOUNCED,
+})
+
+JIKAN_TYPE_MAP = MappingProxyType({
+    'TV': Anime.Type.TV,
+    'Movie': Anime.Type.MOVIE,
+    'OVA': Anime.Type.OVA,
+    'ONA': Anime.Type.ONA,
+    'Special': Anime.Type.SPECIAL,
+    'Music': Anime.Type.SPECIAL,
+})
+
+ANILIST_STATUS_MAP = MappingProxyType({
+    'RELEASING': Anime.Status.ONGOING,
+    'FINISHED': Anime.Status.COMPLETED,
+    'NOT_YET_RELEASED': Anime.Status.ANNOUNCED,
+    'CANCELLED': Anime.Status.DROPPED,
+})
+
+ANILIST_TYPE_MAP = MappingProxyType({
+    'TV': Anime.Type.TV,
+    'MOVIE': Anime.Type.MOVIE,
+    'OVA': Anime.Type.OVA,
+    'ONA': Anime.Type.ONA,
+    'SPECIAL': Anime.Type.SPECIAL,
+    'MUSIC': Anime.Type.SPECIAL,
+})
+
 class AnimeProcessor:
     """Process anime data from APIs and save to database"""
     
@@ -24,13 +90,17 @@ class AnimeProcessor:
             return ""
             
         # Для японських названий не видаляємо ієрогліфи
-        if any('\u3040' <= c <= '\u30ff' or '\u3400' <= c <= '\u4dbf' or '\u4e00' <= c <= '\u9fff' for c in title):
+        if _CJK_RE.search(title):
             # Тільки обрізаємо довжину для японських назв, не фільтруючи символи
-            return title[:250] if len(title) > 250 else title
+            return title[:250]
             
         # Для не-японських назв застосовуємо фільтрацію проблемних символів
-        cleaned_title = re.sub(r'[^\w\s\-_.,:;()\[\]{}]', '', title)
-        return cleaned_title[:250] if len(cleaned_title) > 250 else cleaned_title
+        return _TITLE_CLEAN_RE.sub('', title)[:250]
+    
+    @staticmethod
+    def map_season(season_name):
+        """Map an API season name ('winter', 'WINTER', ...) to Anime.Season"""
+        return Anime.Season.__members__.get((season_name or '').upper())
     
     @classmethod
     def fetch_and_process_combined(cls, page=1, limit=25, mode="top", mal_id=None, year=None, season=None):
@@ -56,81 +126,154 @@ class AnimeProcessor:
         
         # Fetch anime data from Jikan API
         if mal_id:
-            logger.info(f"Fetching anime with MAL ID {mal_id} from Jikan API")
-            jikan_data = [jikan_fetcher.fetch_anime_details(mal_id)]
-            if jikan_data[0] is None:
-                logger.warning(f"Could not fetch anime with MAL ID {mal_id} from Jikan API")
-                jikan_data = []
+            logger.info("Fetching anime with MAL ID %s from Jikan API", mal_id)
+            fetch_jikan = lambda: [jikan_fetcher.fetch_anime_details(mal_id)]
         elif mode == "top":
-            logger.info(f"Fetching top anime from Jikan API (page {page}, limit {limit})")
-            jikan_data = jikan_fetcher.fetch_top_anime(page=page, limit=limit)
+            logger.info("Fetching top anime from Jikan API (page %s, limit %s)", page, limit)
+            fetch_jikan = lambda: jikan_fetcher.fetch_top_anime(page=page, limit=limit)
         elif mode == "seasonal":
             logger.info("Fetching seasonal anime from Jikan API")
-            jikan_data = jikan_fetcher.fetch_seasonal_anime()
+            fetch_jikan = jikan_fetcher.fetch_seasonal_anime
         else:
-            logger.warning(f"Unknown mode '{mode}', no anime data will be fetched")
-            jikan_data = []
-            
-        logger.info(f"Received {len(jikan_data)} anime entries from Jikan API")
+            logger.warning("Unknown mode '%s', no anime data will be fetched", mode)
+            fetch_jikan = list
         
         # Instead of fetching individual Anilist data for each anime,
-        # fetch a batch of popular anime from Anilist to use as supplementary data
-        anilist_cache = {}
+        # fetch a batch of popular anime from Anilist to use as supplementary data.
+        # Both APIs are independent, so the two requests run at the same time.
+        if mode in ["top", "seasonal"]:
+            logger.info("Fetching batch of %s anime from Anilist API to use as supplementary data", limit)
+            jikan_data, anilist_batch = fetch_concurrently(
+                lambda fetch: fetch(),
+                [fetch_jikan, lambda: anilist_fetcher.fetch_popular_anime(page=page, per_page=limit)],
+                max_workers=2,
+            )
+        else:
+            jikan_data, anilist_batch = fetch_jikan(), []
         
-        # Only fetch from Anilist if we have Jikan data and not in "detail" mode (which is for specific anime)
-        if jikan_data and mode in ["top", "seasonal"]:
-            logger.info(f"Fetching batch of {limit} anime from Anilist API to use as supplementary data")
-            anilist_batch = anilist_fetcher.fetch_popular_anime(page=page, per_page=limit)
+        if mal_id and jikan_data[0] is None:
+            logger.warning("Could not fetch anime with MAL ID %s from Jikan API", mal_id)
+            jikan_data = []
             
-            # Create a mapping of MAL IDs to Anilist data for easy lookup
+        logger.info("Received %s anime entries from Jikan API", len(jikan_data))
+        
+        # Create a mapping of MAL IDs to Anilist data for easy lookup
+        anilist_cache = {}
+        if jikan_data:
             for anilist_entry in anilist_batch:
                 if anilist_entry.get('idMal'):
                     anilist_cache[anilist_entry['idMal']] = anilist_entry
             
-            logger.info(f"Cached {len(anilist_cache)} anime entries from Anilist API")
+            logger.info("Cached %s anime entries from Anilist API", len(anilist_cache))
+        
+        # Anime missing from the batch are looked up in aliased batches before any DB work
+        missing_ids = [
+            item.get('mal_id') for item in jikan_data
+            if item.get('mal_id') and item.get('mal_id') not in anilist_cache
+        ]
+        if missing_ids:
+            logger.info("Fetching %s anime missing from the Anilist cache", len(missing_ids))
+            try:
+                missing_entries = anilist_fetcher.fetch_anime_by_ids(missing_ids)
+            except Exception as e:
+                # Наприклад, задовге обмеження rate limiter'а - обробляємо сторінку без даних Anilist
+                logger.error("Error fetching missing anime from Anilist API: %s", e)
+                missing_entries = [None] * len(missing_ids)
+            for missing_id, anilist_entry in zip(missing_ids, missing_entries):
+                if anilist_entry:
+                    anilist_cache[missing_id] = anilist_entry
+                else:
+                    logger.warning("Could not fetch anime ID %s from Anilist API", missing_id)
+        
+        # Existing rows for the whole page are loaded with one query
+        page_ids = [item.get('mal_id') for item in jikan_data if item.get('mal_id')]
+        existing_map = {
+            anime.mal_id: anime
+            for anime in Anime.objects.filter(mal_id__in=page_ids).defer('description')
+        }
+        existing_screenshots = ImageService.get_existing_urls([anime.id for anime in existing_map.values()])
+        # Списки епізодів - єдині мережеві запити всередині циклу нижче; перші сторінки
+        # завантажуємо для всієї сторінки паралельно (кожен запит чекає слот rate limiter'а),
+        # і цикл бере їх із кешу відповідей. Запис у БД при цьому лишається послідовним.
+        if page_ids:
+            fetch_concurrently(
+                lambda anime_mal_id: AnimeProcessor._prefetch_episodes(jikan_fetcher, anime_mal_id),
+                page_ids, max_workers=3
+            )
+        translations = AnimeProcessor._prefetch_translations(jikan_data, existing_map, anilist_cache)
+        AnimeProcessor.warm_genre_cache()
+        # Зв'язки аніме-жанр для всієї сторінки вставляються одним запитом після циклу,
+        # разом із хешами даних цих аніме
+        pending_genre_links = []
+        pending_hashes = []
         
         # Process each anime with combined data
         for anime_jikan in jikan_data:
             try:
                 # Get MAL ID for cross-referencing
                 mal_id = anime_jikan.get('mal_id')
-                logger.info(f"Processing anime ID {mal_id} from Jikan")
+                logger.debug("Processing anime ID %s from Jikan", mal_id)
                 
-                # Try to get the anime from Anilist cache first
-                anilist_data = None
-                if mal_id and mal_id in anilist_cache:
-                    anilist_data = anilist_cache[mal_id]
-                    logger.info(f"Found anime ID {mal_id} in Anilist cache")
-                # If not in cache and we have a MAL ID, fetch from Anilist API individually
-                elif mal_id:
-                    logger.info(f"Anime ID {mal_id} not in cache, fetching from Anilist API")
-                    anilist_data = anilist_fetcher.fetch_anime_by_id(mal_id)
-                    if anilist_data:
-                        logger.info(f"Successfully fetched anime ID {mal_id} from Anilist API")
-                    else:
-                        logger.warning(f"Could not fetch anime ID {mal_id} from Anilist API")
+                anilist_data = anilist_cache.get(mal_id) if mal_id else None
                 
                 # Process the anime with combined data
-                processed = AnimeProcessor.process_combined_anime(anime_jikan, anilist_data)
+                processed = AnimeProcessor.process_combined_anime(
+                    anime_jikan, anilist_data,
+                    existing_map=existing_map, existing_screenshots=existing_screenshots,
+                    translations=translations, pending_genre_links=pending_genre_links,
+                    pending_hashes=pending_hashes
+                )
                 if processed:
                     processed_anime.append(processed)
-                    logger.info(f"Successfully processed anime '{processed.title_original}'")
+                    # Повтори того ж MAL ID на сторінці оновлюють щойно створений запис
+                    existing_map.setdefault(mal_id, processed)
+                    logger.debug("Successfully processed anime '%s'", processed.title_original)
                 else:
-                    logger.warning(f"Failed to process anime ID {mal_id}")
+                    logger.warning("Failed to process anime ID %s", mal_id)
             except Exception as e:
-                logger.error(f"Error processing anime: {str(e)}")
-                logger.error(traceback.format_exc())
+                logger.error("Error processing anime: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+        
+        # Хеш означає "аніме повністю оброблене", тож записуємо його лише разом зі зв'язками:
+        # якщо вставка не вдасться, наступний запуск обробить ці аніме знову
+        with transaction.atomic():
+            if pending_genre_links:
+                Anime.genres.through.objects.bulk_create(pending_genre_links, ignore_conflicts=True, batch_size=500)
+            if pending_hashes:
+                Anime.objects.bulk_update(pending_hashes, ['data_hash'], batch_size=500)
         
         return processed_anime
     
     @staticmethod
-    def process_combined_anime(jikan_data, anilist_data=None):
+    def _prefetch_episodes(jikan_fetcher, mal_id):
+        """Warm the response cache with the first Jikan episode page of an anime"""
+        # Лише перша сторінка: fetch_all_anime_episodes має власний пул потоків,
+        # а вкладені пули множать кількість одночасних запитів
+        try:
+            jikan_fetcher.fetch_anime_episodes(mal_id)
+        except Exception as e:
+            # Попереднє завантаження необов'язкове - process_episodes повторить запит
+            logger.warning("Could not prefetch episodes for anime ID %s: %s", mal_id, e)
+    
+    @staticmethod
+    def process_combined_anime(jikan_data, anilist_data=None, existing_map=None, existing_screenshots=None,
+                               translations=None, pending_genre_links=None, pending_hashes=None):
         """
         Process anime by combining data from both Jikan and Anilist APIs
         
         Args:
             jikan_data: Anime data from Jikan API
             anilist_data: Optional anime data from Anilist API
+            existing_map: Optional {mal_id: Anime} prefetched by the caller; when
+                given, no lookup query is issued for this anime
+            existing_screenshots: Optional {anime_id: set of URLs} prefetched by
+                the caller for the screenshot step
+            translations: Optional {source text: translation} prefetched by the
+                caller for the whole page
+            pending_genre_links: Optional list collecting anime-genre rows for
+                the caller to bulk insert after the page
+            pending_hashes: Optional list collecting anime whose data_hash the
+                caller writes together with pending_genre_links; until then the
+                row is saved without a hash
         
         Returns:
             Processed Anime object
@@ -140,43 +283,90 @@ class AnimeProcessor:
             mal_id = jikan_data.get('mal_id')
             
             # Check if anime already exists
-            existing_anime = Anime.objects.filter(mal_id=mal_id).first() if mal_id else None
+            if existing_map is not None:
+                existing_anime = existing_map.get(mal_id)
+            else:
+                # Окремий виклик - це окремий запуск імпорту
+                AnimeProcessor.warm_genre_cache()
+                existing_anime = Anime.objects.filter(mal_id=mal_id).defer('description').first() if mal_id else None
+            
+            data_hash = AnimeProcessor.compute_data_hash(jikan_data, anilist_data)
+            if existing_anime and existing_anime.data_hash == data_hash:
+                # Дані API не змінилися - пропускаємо переклад і запис, оновлюємо лише епізоди
+                logger.debug("Anime %s unchanged since last import, skipping update", mal_id)
+                EpisodeService.process_episodes(existing_anime, jikan_data, anilist_data)
+                return existing_anime
+            
+            # Якщо текст-джерело опису не змінився, збережений переклад лишається чинним
+            description_hash = AnimeProcessor.compute_description_hash(jikan_data, anilist_data)
+            translate_description = not (existing_anime and existing_anime.description_hash == description_hash)
             
             if existing_anime:
                 anime = existing_anime
+                snapshot = AnimeProcessor._snapshot_fields(anime)
             else:
+                snapshot = None
                 anime = Anime()
                 if mal_id:
                     anime.mal_id = mal_id
             
-            # Process Jikan data
-            AnimeProcessor._apply_jikan_data(anime, jikan_data)
+            # Process Jikan data (a description left untranslated clears the hash so it is retried)
+            anime.description_hash = description_hash
+            title_translated = AnimeProcessor._apply_jikan_data(anime, jikan_data, translations, translate_description)
             
             # Apply Anilist data to enhance if available
             if anilist_data:
-                AnimeProcessor._enhance_with_anilist_data(anime, anilist_data)
-            
-            # Save the anime to get an ID if it's new
-            anime.save()
-            
-            # Process genres and other M2M relationships
-            AnimeProcessor._process_genres(anime, jikan_data, anilist_data)
+                AnimeProcessor._enhance_with_anilist_data(anime, anilist_data, translate_description)
+            
+            # Зв'язки з жанрами передаються викликачу лише після успішного коміту
+            genre_links = [] if pending_genre_links is not None else None
+            
+            # The hash is only kept when every translation succeeded, so failed ones are retried next run;
+            # with pending_hashes the caller writes it together with the page's genre links
+            if not (title_translated and anime.description_hash):
+                data_hash = ''
+            defer_hash = pending_hashes is not None and bool(data_hash)
+            
+            # Запис аніме, жанрів і скріншотів - одна транзакція; мережеві виклики
+            # (переклад вище, епізоди нижче) виконуються поза нею
+            with transaction.atomic():
+                # Save the anime to get an ID if it's new
+                anime.data_hash = '' if defer_hash else data_hash
+                AnimeProcessor._save_anime(anime, snapshot)
+                
+                # Process genres and other M2M relationships
+                AnimeProcessor._process_genres(anime, jikan_data, anilist_data, pending_links=genre_links)
+                
+                # Process screenshots from both sources, prioritizing Anilist's streaming episodes
+                existing_urls = existing_screenshots.setdefault(anime.id, set()) if existing_screenshots is not None else None
+                ImageService.process_screenshots(anime, jikan_data, anilist_data, existing_urls=existing_urls)
             
-            # Process screenshots from both sources, prioritizing Anilist's streaming episodes
-            ImageService.process_screenshots(anime, jikan_data, anilist_data)
+            if genre_links:
+                pending_genre_links.extend(genre_links)
+            if defer_hash:
+                anime.data_hash = data_hash
+                pending_hashes.append(anime)
             
             # Process episodes data - pass both API data to get maximum information
             EpisodeService.process_episodes(anime, jikan_data, anilist_data)
             
             return anime
         except Exception as e:
-            logger.error(f"Error in process_combined_anime: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.error("Error in process_combined_anime: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
             return None
     
     @staticmethod
-    def _apply_jikan_data(anime, data):
-        """Apply basic data from Jikan API to anime object"""
+    def _apply_jikan_data(anime, data, translations=None, translate_description=True):
+        """
+        Apply basic data from Jikan API to anime object
+        
+        translations is an optional {source text: translated text} dict from
+        _prefetch_translations; texts found there skip the translation calls.
+        With translate_description=False the stored description is kept as is.
+        
+        Returns False when the title translation fell back to the original title.
+        """
+        translations = translations or {}
         # Basic info
         anime.title_original = data['title']
         anime.title_english = data.get('title_english', '')
@@ -198,95 +388,156 @@ class AnimeProcessor:
         source_title = anime.title_japanese if anime.title_japanese else (anime.title_english or anime.title_original)
         
         # Якщо українська назва ще не заповнена або має значення за замовчуванням
+        title_translated = True
         if not anime.title_ukrainian or anime.title_ukrainian == anime.title_original:
-            try:
+            if source_title in translations:
+                translated = translations[source_title]
+            else:
                 # Перекладаємо назву на українську
-                anime.title_ukrainian = TranslationService.translate_text(source_title, source_lang=source_lang)
-                logger.info(f"Title translated to Ukrainian: {anime.title_ukrainian}")
-            except Exception as e:
-                logger.error(f"Failed to translate title: {str(e)}")
-                # Залишаємо як fallback оригінальну назву, якщо не вдалося перекласти
+                translated = TranslationService.translate_text(source_title, source_lang=source_lang)
+            
+            # Сервіс перекладу не кидає винятків, а при невдачі повертає оригінал
+            title_translated = bool(translated) and translated != source_title
+            if title_translated:
+                anime.title_ukrainian = translated
+                logger.debug("Title translated to Ukrainian: %s", anime.title_ukrainian)
+            else:
+                logger.warning("Failed to translate title: %s", source_title)
+                # Залишаємо як fallback оригінальну назву, тож наступний запуск перекладе її знову
                 anime.title_ukrainian = data['title']
         
-        # Description and metadata
+        # Перекладаємо опис на українську мову, якщо його джерело змінилося
+        if translate_description:
+            AnimeProcessor._translate_jikan_description(anime, data, translations)
+        
+        for field, value in AnimeProcessor._parse_jikan_fields(data).items():
+            setattr(anime, field, value)
+        
+        return title_translated
+    
+    @staticmethod
+    def _translate_jikan_description(anime, data, translations):
+        """
+        Set the Ukrainian description from the Jikan synopsis and background
+        
+        A failed translation leaves the source text and clears description_hash.
+        """
+        description_source = AnimeProcessor._jikan_description_source(data)
+        if not description_source:
+            anime.description = ""
+            return
+        
+        if description_source in translations:
+            translated = translations[description_source]
+        else:
+            # Визначаємо мову оригіналу опису
+            desc_lang = TranslationService.detect_language(description_source)
+            # Перекладаємо опис
+            translated = TranslationService.translate_text(description_source, source_lang=desc_lang)
+            logger.debug("Description translated to Ukrainian, original language: %s", desc_lang)
+        
+        # Сервіс перекладу не кидає винятків, а при невдачі повертає оригінал
+        if not translated or translated == description_source:
+            logger.warning("Failed to translate description for anime %s", anime.mal_id)
+            anime.description = description_source
+            anime.description_hash = ''
+        else:
+            anime.description = translated
+    
+    @staticmethod
+    def _jikan_description_source(data):
+        """Build the untranslated description (synopsis plus background) from Jikan data"""
         description_source = data.get('synopsis') or ''
         if data.get('background'):
             description_source += f"\n\nBackground: {data['background']}"
+        return description_source
+    
+    @staticmethod
+    def _prefetch_translations(jikan_data, existing_map, anilist_cache=None):
+        """
+        Translate the titles and descriptions of a whole page concurrently
         
-        # Перекладаємо опис на українську мову
-        try:
+        Mirrors the choices made in _apply_jikan_data (titles are only
+        translated for new anime or ones without a Ukrainian title; anime whose
+        data_hash is unchanged are skipped, and so are descriptions whose
+        description_hash is unchanged) and returns {source text: translated text}.
+        """
+        titles = {'ja': [], 'en': []}
+        descriptions = []
+        
+        anilist_cache = anilist_cache or {}
+        for item in jikan_data:
+            existing = existing_map.get(item.get('mal_id'))
+            if existing and existing.data_hash == AnimeProcessor.compute_data_hash(item, anilist_cache.get(item.get('mal_id'))):
+                # Незмінені аніме не оброблятимуться, тож і перекладати нічого
+                continue
+            if existing is None or not existing.title_ukrainian or existing.title_ukrainian == existing.title_original:
+                title_english = item.get('title_english') or ''
+                title_japanese = item.get('title_japanese') or (existing.title_japanese if existing else '')
+                for title_obj in item.get('titles') or []:
+                    if title_obj.get('type') == 'English':
+                        title_english = title_obj.get('title', title_english)
+                    elif title_obj.get('type') == 'Japanese':
+                        title_japanese = title_obj.get('title', '')
+                source_title = title_japanese or title_english or item.get('title')
+                if source_title:
+                    titles['ja' if title_japanese else 'en'].append(source_title)
+            
+            if existing and existing.description_hash == AnimeProcessor.compute_description_hash(item, anilist_cache.get(item.get('mal_id'))):
+                continue
+            description_source = AnimeProcessor._jikan_description_source(item)
             if description_source:
-                # Визначаємо мову оригіналу опису
-                desc_lang = TranslationService.detect_language(description_source)
-                # Перекладаємо опис
-                anime.description = TranslationService.translate_text(description_source, source_lang=desc_lang)
-                logger.info(f"Description translated to Ukrainian, original language: {desc_lang}")
-            else:
-                anime.description = ""
-        except Exception as e:
-            logger.error(f"Failed to translate description: {str(e)}")
-            anime.description = description_source  # Використовуємо оригінал, якщо не вдалося перекласти
+                descriptions.append(description_source)
+        
+        translations = {}
+        for lang, texts in titles.items():
+            if texts:
+                translations.update(zip(texts, TranslationService.translate_batch(texts, source_lang=lang)))
+        if descriptions:
+            translations.update(zip(descriptions, TranslationService.translate_batch(descriptions)))
+        return translations
+    
+    @staticmethod
+    def _parse_jikan_fields(data):
+        """
+        Parse the non-translated Jikan fields into a {field: value} dict
         
-        anime.year = data.get('year') or datetime.now().year
-        anime.episodes_count = data.get('episodes') or 0
-        anime.rating = float(data.get('score') or 0)
+        Pure function with no DB or network access; fields missing from the
+        payload are left out so existing values are kept.
+        """
+        fields = {
+            'year': data.get('year') or datetime.now().year,
+            'episodes_count': data.get('episodes') or 0,
+            'rating': float(data.get('score') or 0),
+        }
         
         # Handle trailer
         if data.get('trailer'):
             trailer_data = data['trailer']
             if trailer_data.get('youtube_id'):
-                anime.youtube_trailer = trailer_data['youtube_id']
-            elif trailer_data.get('url') and 'youtube.com' in trailer_data['url']:
-                try:
-                    if 'watch?v=' in trailer_data['url']:
-                        youtube_id = trailer_data['url'].split('watch?v=')[1].split('&')[0]
-                        anime.youtube_trailer = youtube_id
-                    elif 'youtu.be' in trailer_data['url']:
-                        youtube_id = trailer_data['url'].split('/')[-1]
-                        anime.youtube_trailer = youtube_id
-                except Exception as e:
-                    logger.error(f"Failed to extract YouTube ID: {str(e)}")
+                fields['youtube_trailer'] = trailer_data['youtube_id']
+            else:
+                match = _YT_ID_RE.search(trailer_data.get('url') or trailer_data.get('embed_url') or '')
+                if match:
+                    fields['youtube_trailer'] = match.group(1)
         
         # Status and type
-        status_map = {
-            'Airing': 'ongoing',
-            'Currently Airing': 'ongoing',
-            'Finished Airing': 'completed',
-            'Not yet aired': 'announced',
-        }
-        anime.status = status_map.get(data.get('status'), 'ongoing')
-        
-        type_map = {
-            'TV': 'tv',
-            'Movie': 'movie',
-            'OVA': 'ova',
-            'ONA': 'ona',
-            'Special': 'special',
-            'Music': 'special'
-        }
-        anime.type = type_map.get(data.get('type'), 'tv')
+        fields['status'] = JIKAN_STATUS_MAP.get(data.get('status'), Anime.Status.ONGOING)
+        
+        fields['type'] = JIKAN_TYPE_MAP.get(data.get('type'), Anime.Type.TV)
         
         # Season
         if data.get('season'):
-            anime.season = data['season'].lower()
+            fields['season'] = AnimeProcessor.map_season(data['season'])
         
         # Images
-        if data.get('images'):
-            if data['images'].get('jpg'):
-                if data['images']['jpg'].get('large_image_url'):
-                    anime.poster_url = data['images']['jpg']['large_image_url']
-                elif data['images']['jpg'].get('image_url'):
-                    anime.poster_url = data['images']['jpg']['image_url']
-            
-            if data.get('images', {}).get('jpg', {}).get('large_image_url'):
-                anime.banner_url = data['images']['jpg']['large_image_url']
-        
-        # Generate slug if needed
-        if not anime.slug:
-            base_slug = slugify(anime.title_ukrainian)
-            if len(base_slug) > 250:
-                base_slug = base_slug[:250]
-            anime.slug = base_slug
+        jpg = (data.get('images') or {}).get('jpg') or {}
+        large_image = jpg.get('large_image_url')
+        poster = large_image or jpg.get('image_url')
+        if poster:
+            fields['poster_url'] = poster
+        if large_image:
+            fields['banner_url'] = large_image
         
         # Get duration per episode
         if data.get('duration'):
@@ -294,20 +545,22 @@ class AnimeProcessor:
                 duration_str = data['duration']
                 if isinstance(duration_str, str):
                     # Extract minutes from duration string like "24 min"
-                    duration_match = re.search(r'(\d+)', duration_str)
+                    duration_match = _DURATION_RE.search(duration_str)
                     if duration_match:
-                        anime.duration_per_episode = int(duration_match.group(1))
+                        fields['duration_per_episode'] = int(duration_match.group(1))
                     else:
-                        anime.duration_per_episode = 24  # Default
+                        fields['duration_per_episode'] = 24  # Default
                 elif isinstance(duration_str, (int, float)):
-                    anime.duration_per_episode = int(duration_str)
+                    fields['duration_per_episode'] = int(duration_str)
                 else:
-                    anime.duration_per_episode = 24
+                    fields['duration_per_episode'] = 24
             except Exception:
-                anime.duration_per_episode = 24
-    
+                fields['duration_per_episode'] = 24
+        
+        return fields
+
     @staticmethod
-    def _enhance_with_anilist_data(anime, data):
+    def _enhance_with_anilist_data(anime, data, translate_description=True):
         """Enhance anime object with additional data from Anilist"""
         # Only update fields if they're empty or if Anilist has better data
         
@@ -320,16 +573,18 @@ class AnimeProcessor:
                 anime.title_japanese = AnimeProcessor.clean_title(data['title']['native'])
         
         # Description - use Anilist's if it's longer and meaningful, and translate
-        if data.get('description') and len(data['description']) > len(anime.description):
-            try:
-                # Визначаємо мову опису
-                desc_lang = TranslationService.detect_language(data['description'])
-                # Перекладаємо опис
-                anime.description = TranslationService.translate_text(data['description'], source_lang=desc_lang)
-                logger.info(f"Enhanced description translated to Ukrainian, original language: {desc_lang}")
-            except Exception as e:
-                logger.error(f"Failed to translate enhanced description: {str(e)}")
-                anime.description = data['description']  # Використовуємо оригінал, якщо не вдалося перекласти
+        if translate_description and data.get('description') and len(data['description']) > len(anime.description):
+            # Визначаємо мову опису
+            desc_lang = TranslationService.detect_language(data['description'])
+            # Перекладаємо опис (при невдачі сервіс повертає оригінал)
+            translated = TranslationService.translate_text(data['description'], source_lang=desc_lang)
+            if not translated or translated == data['description']:
+                logger.warning("Failed to translate enhanced description for anime %s", anime.mal_id)
+                anime.description = data['description']
+                anime.description_hash = ''
+            else:
+                anime.description = translated
+                logger.debug("Enhanced description translated to Ukrainian, original language: %s", desc_lang)
         
         # Year, episodes, and rating
         if not anime.year and data.get('seasonYear'):
@@ -344,7 +599,7 @@ class AnimeProcessor:
         
         # Season
         if not anime.season and data.get('season'):
-            anime.season = data['season'].lower()
+            anime.season = AnimeProcessor.map_season(data['season'])
         
         # Trailer
         if not anime.youtube_trailer and data.get('trailer'):
@@ -354,216 +609,326 @@ class AnimeProcessor:
         
         # Status
         if data.get('status'):
-            status_map = {
-                'RELEASING': 'ongoing',
-                'FINISHED': 'completed',
-                'NOT_YET_RELEASED': 'announced',
-                'CANCELLED': 'dropped'
-            }
-            if anime.status not in ['completed', 'dropped']:  # Don't override these statuses
-                anime.status = status_map.get(data['status'], anime.status)
+            if anime.status not in [Anime.Status.COMPLETED, Anime.Status.DROPPED]:  # Don't override these statuses
+                anime.status = ANILIST_STATUS_MAP.get(data['status'], anime.status)
         
         # Format/Type
         if data.get('format'):
-            type_map = {
-                'TV': 'tv',
-                'MOVIE': 'movie',
-                'OVA': 'ova',
-                'ONA': 'ona',
-                'SPECIAL': 'special',
-                'MUSIC': 'special'
-            }
-            anime.type = type_map.get(data['format'], anime.type)
+            anime.type = ANILIST_TYPE_MAP.get(data['format'], anime.type)
         
         # Images - Use Anilist's if available and better quality
-        if data.get('coverImage', {}).get('extraLarge'):
-            anime.poster_url = data['coverImage']['extraLarge']
-        elif data.get('coverImage', {}).get('large') and not anime.poster_url:
-            anime.poster_url = data['coverImage']['large']
+        cover = data.get('coverImage') or {}
+        if cover.get('extraLarge'):
+            anime.poster_url = cover['extraLarge']
+        elif cover.get('large') and not anime.poster_url:
+            anime.poster_url = cover['large']
         
         if data.get('bannerImage') and not anime.banner_url:
             anime.banner_url = data['bannerImage']
 
     @staticmethod
-    def _process_genres(anime, jikan_data, anilist_data=None):
-        """Process and save genres from both API sources"""
-        # Process Jikan genres
-        if jikan_data.get('genres'):
-            for genre_data in jikan_data['genres']:
-                genre_name = genre_data['name']
-                genre, created = Genre.objects.get_or_create(name=genre_name)
-                anime.genres.add(genre)
-        
-        # Process Jikan themes
-        if jikan_data.get('themes'):
-            for theme_data in jikan_data['themes']:
-                theme_name = theme_data['name']
-                theme_genre, created = Genre.objects.get_or_create(name=theme_name)
-                anime.genres.add(theme_genre)
-        
-        # Process Jikan demographics
-        if jikan_data.get('demographics'):
-            for demo_data in jikan_data['demographics']:
-                demo_name = demo_data['name']
-                demo_genre, created = Genre.objects.get_or_create(name=demo_name)
-                anime.genres.add(demo_genre)
-        
-        # Process Anilist genres if available
-        if anilist_data and anilist_data.get('genres'):
-            for genre_name in anilist_data['genres']:
-                genre, created = Genre.objects.get_or_create(name=genre_name)
-                anime.genres.add(genre)
-        
-        # Process Anilist tags if available
-        if anilist_data and anilist_data.get('tags'):
-            for tag_data in anilist_data['tags']:
-                if tag_data.get('name'):
-                    tag_genre, created = Genre.objects.get_or_create(name=tag_data['name'])
-                    anime.genres.add(tag_genre)
+    def compute_data_hash(jikan_data, anilist_data=None):
+        """Hash the API fields the processor uses, to detect unchanged anime between runs"""
+        payload = {
+            'jikan': {key: jikan_data.get(key) for key in _JIKAN_HASH_KEYS},
+            'anilist': {key: anilist_data.get(key) for key in _ANILIST_HASH_KEYS} if anilist_data else None,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+    
+    @staticmethod
+    def compute_description_hash(jikan_data, anilist_data=None):
+        """Hash the untranslated description sources, to reuse a stored translation between runs"""
+        anilist_description = (anilist_data or {}).get('description') or ''
+        source = AnimeProcessor._jikan_description_source(jikan_data) + '\0' + anilist_description
+        return hashlib.blake2b(source.encode('utf-8'), digest_size=16).hexdigest()
+    
+    @staticmethod
+    def _snapshot_fields(anime):
+        """Remember the loaded column values of an existing anime (deferred fields are skipped)"""
+        return {
+            field.attname: anime.__dict__[field.attname]
+            for field in Anime._meta.concrete_fields
+            if field.attname in anime.__dict__
+        }
+    
+    @staticmethod
+    def _save_anime(anime, snapshot=None):
+        """
+        Save an anime, writing only the columns that changed since the snapshot
+        
+        New rows (no snapshot) and rows whose priority or schedule still need
+        computing in Anime.save() get a full save.
+        """
+        if snapshot is None or anime.update_priority == 5 or not anime.next_update_scheduled:
+            anime.save()
+            return
+        
+        changed = [
+            field.attname for field in Anime._meta.concrete_fields
+            if field.attname in anime.__dict__
+            and (field.attname not in snapshot or anime.__dict__[field.attname] != snapshot[field.attname])
+        ]
+        if changed:
+            anime.save(update_fields=changed + ['updated_at'])
+    
+    @staticmethod
+    def _process_genres(anime, jikan_data, anilist_data=None, pending_links=None):
+        """
+        Process and save genres from both API sources
+        
+        When pending_links is given, the anime-genre rows are appended to it
+        for the caller to insert in one bulk_create instead of being added here.
+        """
+        names = set()
+        
+        # Jikan genres, themes and demographics
+        if jikan_data:
+            for key in ('genres', 'themes', 'demographics'):
+                names.update(item['name'] for item in jikan_data.get(key) or [] if item.get('name'))
+        
+        # Anilist genres and tags
+        if anilist_data:
+            names.update(name for name in anilist_data.get('genres') or [] if name)
+            names.update(tag['name'] for tag in anilist_data.get('tags') or [] if tag.get('name'))
+        
+        if not names:
+            return
+        
+        genre_ids = AnimeProcessor._get_genre_ids(names)
+        if pending_links is not None:
+            through = Anime.genres.through
+            pending_links.extend(through(anime_id=anime.id, genre_id=genre_id) for genre_id in genre_ids.values())
+        else:
+            anime.genres.add(*genre_ids.values())
+    
+    @staticmethod
+    def _get_genre_ids(names):
+        """Return {name: id} for the given genre names, creating missing genres in one query"""
+        genre_ids = {name: _GENRE_ID_CACHE[name] for name in names if name in _GENRE_ID_CACHE}
+        uncached = names - genre_ids.keys()
+        if not uncached:
+            return genre_ids
+        
+        found = dict(Genre.objects.filter(name__in=uncached).values_list('name', 'id'))
+        _GENRE_ID_CACHE.update(found)
+        genre_ids.update(found)
+        missing = uncached - found.keys()
+        
+        if missing:
+            # bulk_create не викликає Genre.save(), тому slug задаємо самі
+            Genre.objects.bulk_create(
+                [Genre(name=name, slug=slugify(name)) for name in missing],
+                ignore_conflicts=True
+            )
+            created = dict(Genre.objects.filter(name__in=missing).values_list('name', 'id'))
+            genre_ids.update(created)
+            # Нові жанри кешуємо лише після коміту, щоб відкат не залишив у кеші неіснуючі id
+            transaction.on_commit(lambda: _GENRE_ID_CACHE.update(created))
+        
+        return genre_ids
+    
+    @staticmethod
+    def warm_genre_cache():
+        """
+        Reload every genre id into the process cache with a single query
+        
+        Called at the start of every import run, so ids of genres deleted or
+        renamed by another process since the last run are never linked.
+        """
+        _GENRE_ID_CACHE.clear()
+        _GENRE_ID_CACHE.update(Genre.objects.values_list('name', 'id'))
+    
+    @staticmethod
+    def clear_genre_cache():
+        """Forget cached genre ids (after genres are deleted or renamed)"""
+        _GENRE_ID_CACHE.clear()
 
     # Legacy methods for compatibility
     @staticmethod
-    def process_jikan_anime(anime_data):
-        """Process anime data from Jikan API and save to database (legacy method)"""
+    def process_jikan_anime(anime_data, existing_map=None):
+        """
+        Process anime data from Jikan API and save to database (legacy method)
+        
+        Args:
+            anime_data: Anime data from Jikan API
+            existing_map: Optional {mal_id: Anime} prefetched by the caller; when
+                given, no lookup query is issued for this anime
+        """
         try:
-            # Check if anime already exists by MAL ID
-            existing_anime = Anime.objects.filter(mal_id=anime_data['mal_id']).first()
-            
-            if existing_anime:
-                anime = existing_anime
-            else:
-                anime = Anime()
-                anime.mal_id = anime_data['mal_id']
-            
-            # Apply Jikan data
-            AnimeProcessor._apply_jikan_data(anime, anime_data)
-            
-            # Save the anime
-            anime.save()
-            
-            # Process genres
-            AnimeProcessor._process_genres(anime, anime_data)
-            
-            # Process screenshots
-            ImageService.process_screenshots(anime, anime_data)
-            
-            return anime
-            
+            # Переклад (мережеві виклики) виконується до відкриття транзакції
+            anime, snapshot = AnimeProcessor._prepare_jikan_anime(anime_data, existing_map)
+            with transaction.atomic():
+                return AnimeProcessor._write_jikan_anime(anime, snapshot, anime_data)
         except Exception as e:
-            logger.error(f"Error processing anime {anime_data.get('title', 'Unknown')}: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.error("Error processing anime %s: %s", anime_data.get('title', 'Unknown'), e, exc_info=logger.isEnabledFor(logging.DEBUG))
             return None
+    
+    @staticmethod
+    def _prepare_jikan_anime(anime_data, existing_map=None):
+        """Load or create the anime and apply the Jikan data (including translations) without writing it"""
+        # Check if anime already exists by MAL ID
+        if existing_map is not None:
+            existing_anime = existing_map.get(anime_data['mal_id'])
+        else:
+            # Окремий виклик - це окремий запуск імпорту
+            AnimeProcessor.warm_genre_cache()
+            existing_anime = Anime.objects.filter(mal_id=anime_data['mal_id']).defer('description').first()
+        
+        if existing_anime:
+            anime = existing_anime
+            snapshot = AnimeProcessor._snapshot_fields(anime)
+        else:
+            snapshot = None
+            anime = Anime()
+            anime.mal_id = anime_data['mal_id']
+        
+        # Apply Jikan data
+        AnimeProcessor._apply_jikan_data(anime, anime_data)
+        return anime, snapshot
+    
+    @staticmethod
+    def _write_jikan_anime(anime, snapshot, anime_data):
+        """Save a prepared anime with its genres and screenshots (call inside a transaction)"""
+        # Save the anime
+        AnimeProcessor._save_anime(anime, snapshot)
+        
+        # Process genres
+        AnimeProcessor._process_genres(anime, anime_data)
+        
+        # Process screenshots
+        ImageService.process_screenshots(anime, anime_data)
+        
+        return anime
+
+    @staticmethod
+    def process_jikan_anime_batch(items):
+        """Process a page of Jikan anime, loading the already stored ones with a single query"""
+        mal_ids = [item['mal_id'] for item in items if item.get('mal_id')]
+        existing_map = {anime.mal_id: anime for anime in Anime.objects.filter(mal_id__in=mal_ids).defer('description')}
+        AnimeProcessor.warm_genre_cache()
+        
+        # Спершу всі переклади - поза транзакцією, щоб не тримати її відкритою під час мережевих викликів
+        prepared = []
+        for item in items:
+            try:
+                prepared.append((item, *AnimeProcessor._prepare_jikan_anime(item, existing_map)))
+            except Exception as e:
+                logger.error("Error processing anime %s: %s", item.get('title', 'Unknown'), e, exc_info=logger.isEnabledFor(logging.DEBUG))
+        
+        processed = []
+        # Одна транзакція на сторінку; кожне аніме працює у власній savepoint,
+        # тож помилка в одному записі не відкочує решту
+        with transaction.atomic():
+            for item, anime, snapshot in prepared:
+                try:
+                    with transaction.atomic():
+                        processed.append(AnimeProcessor._write_jikan_anime(anime, snapshot, item))
+                except Exception as e:
+                    logger.error("Error processing anime %s: %s", item.get('title', 'Unknown'), e, exc_info=logger.isEnabledFor(logging.DEBUG))
+        return processed
 
     @staticmethod
     def process_anilist_anime(anime_data):
         """Process anime data from Anilist API and save to database (legacy method)"""
         try:
-            # Check if anime already exists by MAL ID (if available)
-            existing_anime = None
-            if anime_data.get('idMal'):
-                existing_anime = Anime.objects.filter(mal_id=anime_data['idMal']).first()
-            
-            if existing_anime:
-                anime = existing_anime
-            else:
-                anime = Anime()
-                anime.mal_id = anime_data.get('idMal')
-            
-            # Set basic info
-            anime.title_original = AnimeProcessor.clean_title(anime_data['title']['romaji'])
-            anime.title_english = AnimeProcessor.clean_title(anime_data['title'].get('english', ''))
-            
-            # Add Japanese title
-            if anime_data['title'].get('native'):
-                anime.title_japanese = AnimeProcessor.clean_title(anime_data['title']['native'])
-            
-            # For Ukrainian title, translate from Japanese or English
-            source_lang = 'ja' if anime.title_japanese else 'en'
-            source_title = anime.title_japanese if anime.title_japanese else (anime.title_english or anime.title_original)
-            
-            try:
-                anime.title_ukrainian = TranslationService.translate_text(source_title, source_lang=source_lang)
-            except Exception as e:
-                logger.error(f"Failed to translate title: {str(e)}")
-                anime.title_ukrainian = anime_data['title']['romaji']  # Fallback
-            
-            # Process description
-            if anime_data.get('description'):
+            with transaction.atomic():
+                # Окремий виклик - це окремий запуск імпорту
+                AnimeProcessor.warm_genre_cache()
+                
+                # Check if anime already exists by MAL ID (if available)
+                existing_anime = None
+                if anime_data.get('idMal'):
+                    existing_anime = Anime.objects.filter(mal_id=anime_data['idMal']).defer('description').first()
+                
+                if existing_anime:
+                    anime = existing_anime
+                    snapshot = AnimeProcessor._snapshot_fields(anime)
+                else:
+                    snapshot = None
+                    anime = Anime()
+                    anime.mal_id = anime_data.get('idMal')
+                
+                # Set basic info
+                anime.title_original = AnimeProcessor.clean_title(anime_data['title']['romaji'])
+                anime.title_english = AnimeProcessor.clean_title(anime_data['title'].get('english', ''))
+                
+                # Add Japanese title
+                if anime_data['title'].get('native'):
+                    anime.title_japanese = AnimeProcessor.clean_title(anime_data['title']['native'])
+                
+                # For Ukrainian title, translate from Japanese or English
+                source_lang = 'ja' if anime.title_japanese else 'en'
+                source_title = anime.title_japanese if anime.title_japanese else (anime.title_english or anime.title_original)
+                
                 try:
-                    desc_lang = TranslationService.detect_language(anime_data['description'])
-                    anime.description = TranslationService.translate_text(anime_data['description'], source_lang=desc_lang)
+                    anime.title_ukrainian = TranslationService.translate_text(source_title, source_lang=source_lang)
                 except Exception as e:
-                    logger.error(f"Failed to translate description: {str(e)}")
-                    anime.description = anime_data.get('description', '')
-            else:
-                anime.description = ''
-            
-            # Set metadata
-            anime.year = anime_data.get('seasonYear') or datetime.now().year
-            anime.episodes_count = anime_data.get('episodes') or 0
-            
-            # Convert score from 1-100 to 1-10
-            if anime_data.get('averageScore'):
-                anime.rating = float(anime_data['averageScore']) / 10
-            
-            # Handle trailer
-            if anime_data.get('trailer'):
-                trailer_data = anime_data['trailer']
-                if trailer_data.get('site') == 'youtube' and trailer_data.get('id'):
-                    anime.youtube_trailer = trailer_data['id']
-            
-            # Handle status
-            status_map = {
-                'RELEASING': 'ongoing',
-                'FINISHED': 'completed',
-                'NOT_YET_RELEASED': 'announced',
-                'CANCELLED': 'dropped'
-            }
-            anime.status = status_map.get(anime_data.get('status'), 'ongoing')
-            
-            # Handle type
-            type_map = {
-                'TV': 'tv',
-                'MOVIE': 'movie',
-                'OVA': 'ova',
-                'ONA': 'ona',
-                'SPECIAL': 'special',
-                'MUSIC': 'special'
-            }
-            anime.type = type_map.get(anime_data.get('format'), 'tv')
-            
-            # Handle season
-            if anime_data.get('season'):
-                anime.season = anime_data['season'].lower()
+                    logger.error("Failed to translate title: %s", e)
+                    anime.title_ukrainian = anime_data['title']['romaji']  # Fallback
+                
+                # Process description
+                if anime_data.get('description'):
+                    try:
+                        desc_lang = TranslationService.detect_language(anime_data['description'])
+                        anime.description = TranslationService.translate_text(anime_data['description'], source_lang=desc_lang)
+                    except Exception as e:
+                        logger.error("Failed to translate description: %s", e)
+                        anime.description = anime_data.get('description', '')
+                else:
+                    anime.description = ''
+                
+                # Set metadata
+                anime.year = anime_data.get('seasonYear') or datetime.now().year
+                anime.episodes_count = anime_data.get('episodes') or 0
+                
+                # Convert score from 1-100 to 1-10
+                if anime_data.get('averageScore'):
+                    anime.rating = float(anime_data['averageScore']) / 10
+                
+                # Handle trailer
+                if anime_data.get('trailer'):
+                    trailer_data = anime_data['trailer']
+                    if trailer_data.get('site') == 'youtube' and trailer_data.get('id'):
+                        anime.youtube_trailer = trailer_data['id']
+                
+                # Handle status
+                anime.status = ANILIST_STATUS_MAP.get(anime_data.get('status'), Anime.Status.ONGOING)
+                
+                # Handle type
+                anime.type = ANILIST_TYPE_MAP.get(anime_data.get('format'), Anime.Type.TV)
+                
+                # Handle season
+                if anime_data.get('season'):
+                    anime.season = AnimeProcessor.map_season(anime_data['season'])
+                    
+                # Set image URLs
+                cover = anime_data.get('coverImage') or {}
+                poster = cover.get('large') or cover.get('medium')
+                if poster:
+                    anime.poster_url = poster
+                
+                if anime_data.get('bannerImage'):
+                    anime.banner_url = anime_data['bannerImage']
+                
+                # Save anime
+                AnimeProcessor._save_anime(anime, snapshot)
+                
+                # Process genres
+                AnimeProcessor._process_genres(anime, {}, anime_data)
+                
+                # Process screenshots
+                ImageService.process_screenshots(anime, None, anime_data)
+                
+                return anime
                 
-            # Set image URLs
-            if anime_data.get('coverImage', {}).get('large'):
-                anime.poster_url = anime_data['coverImage']['large']
-            elif anime_data.get('coverImage', {}).get('medium'):
-                anime.poster_url = anime_data['coverImage']['medium']
-            
-            if anime_data.get('bannerImage'):
-                anime.banner_url = anime_data['bannerImage']
-            
-            # Generate slug
-            if not anime.slug:
-                base_slug = slugify(anime.title_ukrainian)
-                if len(base_slug) > 250:
-                    base_slug = base_slug[:250]
-                anime.slug = base_slug
-            
-            # Save anime
-            anime.save()
-            
-            # Process genres
-            AnimeProcessor._process_genres(anime, {}, anime_data)
-            
-            # Process screenshots
-            ImageService.process_screenshots(anime, None, anime_data)
-            
-            return anime
-            
         except Exception as e:
-            logger.error(f"Error processing anime {anime_data.get('title', {}).get('romaji', 'Unknown')}: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.error("Error processing anime %s: %s", anime_data.get('title', {}).get('romaji', 'Unknown'), e, exc_info=logger.isEnabledFor(logging.DEBUG))
             return None
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def _forget_genre_ids(sender, **kwargs):
+    """Drop this process's cached genre ids when a genre is renamed or deleted"""
+    AnimeProcessor.clear_genre_cache()
@@ -16,6 +16,15 @@ from anime.models import Episode
 
 logger = logging.getLogger(__name__)
 
+# Episode number in Anilist streaming titles, e.g. "Episode 12 - ..."
+_EP_RE = re.compile(r'episode\s*(\d+)', re.IGNORECASE)
+
+# Fields process_jikan_episodes may change on existing episodes
+JIKAN_EPISODE_FIELDS = [
+    'title', 'title_japanese', 'title_romanji', 'is_filler', 'is_recap',
+    'release_date', 'score', 'duration',
+]
+
 class EpisodeService:
     """Service for processing and managing anime episodes"""
     
@@ -33,56 +42,87 @@ class EpisodeService:
             else:
                 jikan_episodes = []
             
+            # Load stored episodes once and share the map between all steps below
+            episodes = EpisodeService._load_episodes(anime)
+            
             # Check if we got any episodes from Jikan fetcher
             if jikan_episodes:
-                EpisodeService.process_jikan_episodes(anime, jikan_episodes)
-                logger.info(f"Processed {len(jikan_episodes)} episodes from Jikan API for anime '{anime.title_ukrainian}'")
+                EpisodeService.process_jikan_episodes(anime, jikan_episodes, existing_episodes=episodes)
+                logger.debug("Processed %s episodes from Jikan API for anime '%s'", len(jikan_episodes), anime.title_ukrainian)
             else:
                 # Fall back to episodes in main anime data if available
                 if jikan_data and jikan_data.get('episodes'):
                     basic_episodes = jikan_data.get('episodes', [])
-                    EpisodeService.process_basic_episodes(anime, basic_episodes, jikan_data.get('episodes_count', 0))
+                    EpisodeService.process_basic_episodes(anime, basic_episodes, jikan_data.get('episodes_count', 0), existing_episodes=episodes)
             
             # Additionally process streaming episodes from Anilist API which often have more images
             if anilist_data:
                 # Process streaming episodes for thumbnails
                 if anilist_data.get('streamingEpisodes'):
-                    EpisodeService.process_anilist_streaming_episodes(anime, anilist_data['streamingEpisodes'])
+                    EpisodeService.process_anilist_streaming_episodes(anime, anilist_data['streamingEpisodes'], existing_episodes=episodes)
                     
                 # Process airing schedule if available (for upcoming episodes)
                 if anilist_data.get('airingSchedule') and anilist_data['airingSchedule'].get('nodes'):
-                    EpisodeService.process_anilist_airing_schedule(anime, anilist_data['airingSchedule']['nodes'])
+                    EpisodeService.process_anilist_airing_schedule(anime, anilist_data['airingSchedule']['nodes'], existing_episodes=episodes)
                     
                 # Process next airing episode if available
                 if anilist_data.get('nextAiringEpisode'):
-                    EpisodeService.process_next_airing_episode(anime, anilist_data['nextAiringEpisode'])
+                    EpisodeService.process_next_airing_episode(anime, anilist_data['nextAiringEpisode'], existing_episodes=episodes)
                 
         except Exception as e:
-            logger.error(f"Error processing episodes: {str(e)}")
-            logger.error(f"Error details: {repr(e)}")
+            logger.error("Error processing episodes: %s", e)
+            logger.error("Error details: %r", e)
+    
+    @staticmethod
+    def _load_episodes(anime, numbers=None):
+        """Return {number: Episode} for the anime's stored episodes, optionally limited to numbers"""
+        queryset = Episode.objects.filter(anime=anime)
+        if numbers is not None:
+            queryset = queryset.filter(number__in=list(numbers))
+        return {ep.number: ep for ep in queryset}
     
     @staticmethod
-    def process_jikan_episodes(anime, jikan_episodes):
-        """Process episodes data from Jikan API"""
+    def _remember_created(anime, existing_episodes, numbers):
+        """
+        Put freshly bulk-created episodes into the caller's map
+        
+        bulk_create(ignore_conflicts=True) leaves pk unset, so the rows are
+        read back to make them usable by later bulk_update calls.
+        """
+        if existing_episodes is not None and numbers:
+            existing_episodes.update(EpisodeService._load_episodes(anime, numbers))
+    
+    @staticmethod
+    def process_jikan_episodes(anime, jikan_episodes, existing_episodes=None):
+        """
+        Process episodes data from Jikan API
+        
+        existing_episodes: optional {number: Episode} map loaded by the caller;
+        it is used instead of a lookup query and kept up to date.
+        """
         if not jikan_episodes:
             return
-            
+
+        # Load all episodes in one query instead of one lookup per number
+        existing = existing_episodes if existing_episodes is not None else EpisodeService._load_episodes(anime)
+        to_create = {}
+        # Original values of the stored episodes touched here, to detect real changes
+        snapshots = {}
+
         for ep_data in jikan_episodes:
             ep_number = ep_data.get('mal_id')
             if not ep_number:
                 continue
-                
-            # Try to find existing episode
-            episode = Episode.objects.filter(
-                anime=anime,
-                number=ep_number
-            ).first()
-            
-            if not episode:
+
+            episode = existing.get(ep_number) or to_create.get(ep_number)
+            if episode is None:
                 episode = Episode(
                     anime=anime,
                     number=ep_number
                 )
+                to_create[ep_number] = episode
+            elif ep_number in existing and ep_number not in snapshots:
+                snapshots[ep_number] = {field: getattr(episode, field) for field in JIKAN_EPISODE_FIELDS}
             
             # Set episode details
             if ep_data.get('title'):
@@ -105,7 +145,7 @@ class EpisodeService:
                 try:
                     episode.release_date = parse_date(ep_data['aired'])
                 except Exception as e:
-                    logger.warning(f"Could not parse aired date '{ep_data['aired']}': {str(e)}")
+                    logger.warning("Could not parse aired date '%s': %s", ep_data['aired'], e)
             
             # Set score if available
             if ep_data.get('score') is not None:
@@ -117,88 +157,136 @@ class EpisodeService:
             # Set duration to default if not specified
             if not episode.duration:
                 episode.duration = anime.duration_per_episode or 24  # Default duration
-            
-            # Save the episode
-            episode.save()
+
+        if to_create:
+            Episode.objects.bulk_create(to_create.values(), batch_size=500, ignore_conflicts=True)
+            EpisodeService._remember_created(anime, existing_episodes, to_create.keys())
+
+        # Only write episodes whose values actually changed, and only the changed columns
+        to_update = []
+        dirty_fields = set()
+        for ep_number, snapshot in snapshots.items():
+            episode = existing[ep_number]
+            changed = [field for field, value in snapshot.items() if getattr(episode, field) != value]
+            if changed:
+                to_update.append(episode)
+                dirty_fields.update(changed)
+        
+        if to_update:
+            # bulk_update skips auto_now, so bump updated_at explicitly
+            now = datetime.now(timezone.utc)
+            for episode in to_update:
+                episode.updated_at = now
+            Episode.objects.bulk_update(
+                to_update,
+                [field for field in JIKAN_EPISODE_FIELDS if field in dirty_fields] + ['updated_at'],
+                batch_size=500
+            )
     
     @staticmethod
-    def process_basic_episodes(anime, episodes_data=None, episodes_count=0):
+    def process_basic_episodes(anime, episodes_data=None, episodes_count=0, existing_episodes=None):
         """Process basic episode data or create placeholder episodes"""
         # Check if we already have episodes
-        existing_episodes_count = Episode.objects.filter(anime=anime).count()
+        if existing_episodes is not None:
+            has_episodes = bool(existing_episodes)
+        else:
+            has_episodes = Episode.objects.filter(anime=anime).exists()
         
-        if existing_episodes_count > 0:
-            logger.info(f"Anime '{anime.title_ukrainian}' already has {existing_episodes_count} episodes. Skipping placeholder creation.")
+        if has_episodes:
+            logger.debug("Anime '%s' already has episodes. Skipping placeholder creation.", anime.title_ukrainian)
             return
             
         # If we have a known episode count but no episode data, create placeholders
         if episodes_count > 0:
-            for i in range(1, episodes_count + 1):
-                Episode.objects.create(
-                    anime=anime,
-                    number=i,
-                    title=f"Епізод {i}",
-                    duration=anime.duration_per_episode or 24,
-                    release_date=datetime.now()
-                )
-            logger.info(f"Created {episodes_count} placeholder episodes for anime '{anime.title_ukrainian}'")
+            today = datetime.now().date()
+            duration = anime.duration_per_episode or 24
+            Episode.objects.bulk_create(
+                [
+                    Episode(
+                        anime=anime,
+                        number=i,
+                        title=f"Епізод {i}",
+                        duration=duration,
+                        release_date=today
+                    )
+                    for i in range(1, episodes_count + 1)
+                ],
+                batch_size=500,
+                ignore_conflicts=True
+            )
+            EpisodeService._remember_created(anime, existing_episodes, range(1, episodes_count + 1))
+            logger.debug("Created %s placeholder episodes for anime '%s'", episodes_count, anime.title_ukrainian)
         
     @staticmethod
-    def process_anilist_streaming_episodes(anime, streaming_episodes):
+    def process_anilist_streaming_episodes(anime, streaming_episodes, existing_episodes=None):
         """Process streaming episodes from Anilist to get thumbnails"""
         if not streaming_episodes:
             return
-            
-        # Create a regex pattern to extract episode numbers from titles
-        ep_pattern = re.compile(r'episode\s*(\d+)', re.IGNORECASE)
-        
+
+        # Parse episode numbers first so all matching episodes load in one query
+        updates = {}
         for stream_ep in streaming_episodes:
-            try:
-                # Try to extract episode number from title
-                title = stream_ep.get('title', '')
-                match = ep_pattern.search(title)
-                
-                if match:
-                    ep_number = int(match.group(1))
-                    
-                    # Try to find the episode
-                    episode = Episode.objects.filter(
-                        anime=anime,
-                        number=ep_number
-                    ).first()
-                    
-                    # If episode exists, update its thumbnail
-                    if episode and stream_ep.get('thumbnail'):
-                        episode.thumbnail_url = stream_ep['thumbnail']
-                        if not episode.title or episode.title == f"Епізод {ep_number}":
-                            episode.title = stream_ep.get('title', f"Епізод {ep_number}")
-                        if stream_ep.get('url'):
-                            # Store the streaming URL in appropriate quality field if empty
-                            if not episode.video_url_720p:
-                                episode.video_url_720p = stream_ep['url']
-                        episode.save()
-                        logger.info(f"Updated episode info for {anime.title_ukrainian} episode {ep_number}")
-                    # If episode doesn't exist, create it with available data
-                    elif stream_ep.get('thumbnail'):
-                        episode = Episode(
-                            anime=anime,
-                            number=ep_number,
-                            title=stream_ep.get('title', f"Епізод {ep_number}"),
-                            duration=anime.duration_per_episode or 24,
-                            thumbnail_url=stream_ep['thumbnail'],
-                            release_date=datetime.now()
-                        )
-                        if stream_ep.get('url'):
-                            episode.video_url_720p = stream_ep['url']
-                        episode.save()
-                        logger.info(f"Created new episode with thumbnail for {anime.title_ukrainian} episode {ep_number}")
-                        
-            except Exception as e:
-                logger.error(f"Error processing streaming episode {stream_ep.get('title')}: {str(e)}")
-                continue
-    
+            title = stream_ep.get('title') or ''
+            match = _EP_RE.search(title)
+            if match and stream_ep.get('thumbnail'):
+                updates[int(match.group(1))] = stream_ep
+
+        if not updates:
+            return
+
+        if existing_episodes is not None:
+            existing = existing_episodes
+        else:
+            existing = EpisodeService._load_episodes(anime, updates.keys())
+        to_create = []
+        to_update = []
+        now = datetime.now(timezone.utc)
+
+        for ep_number, stream_ep in updates.items():
+            placeholder_title = f"Епізод {ep_number}"
+            episode = existing.get(ep_number)
+
+            # If episode exists, update its thumbnail
+            if episode:
+                episode.thumbnail_url = stream_ep['thumbnail']
+                if not episode.title or episode.title == placeholder_title:
+                    episode.title = stream_ep.get('title', placeholder_title)
+                # Store the streaming URL in appropriate quality field if empty
+                if stream_ep.get('url') and not episode.video_url_720p:
+                    episode.video_url_720p = stream_ep['url']
+                episode.updated_at = now
+                to_update.append(episode)
+            # If episode doesn't exist, create it with available data
+            else:
+                to_create.append(Episode(
+                    anime=anime,
+                    number=ep_number,
+                    title=stream_ep.get('title', placeholder_title),
+                    duration=anime.duration_per_episode or 24,
+                    thumbnail_url=stream_ep['thumbnail'],
+                    video_url_720p=stream_ep.get('url') or '',
+                    release_date=datetime.now().date()
+                ))
+
+        try:
+            if to_update:
+                Episode.objects.bulk_update(
+                    to_update,
+                    ['thumbnail_url', 'title', 'video_url_720p', 'updated_at'],
+                    batch_size=500
+                )
+            if to_create:
+                Episode.objects.bulk_create(to_create, batch_size=500, ignore_conflicts=True)
+                EpisodeService._remember_created(anime, existing_episodes, [ep.number for ep in to_create])
+            logger.debug(
+                "Updated %s and created %s streaming episodes for %s",
+                len(to_update), len(to_create), anime.title_ukrainian
+            )
+        except Exception as e:
+            logger.error("Error saving streaming episodes for %s: %s", anime.title_ukrainian, e)
+
     @staticmethod
-    def process_anilist_airing_schedule(anime, airing_nodes):
+    def process_anilist_airing_schedule(anime, airing_nodes, existing_episodes=None):
         """Process airing schedule from Anilist to get episode air dates"""
         if not airing_nodes:
             return
@@ -210,10 +298,13 @@ class EpisodeService:
                     continue
                 
                 # Find or create episode
-                episode = Episode.objects.filter(
-                    anime=anime,
-                    number=ep_number
-                ).first()
+                if existing_episodes is not None:
+                    episode = existing_episodes.get(ep_number)
+                else:
+                    episode = Episode.objects.filter(
+                        anime=anime,
+                        number=ep_number
+                    ).first()
                 
                 if not episode:
                     episode = Episode(
@@ -231,14 +322,16 @@ class EpisodeService:
                     ).date()
                 
                 episode.save()
-                logger.debug(f"Updated airing date for {anime.title_ukrainian} episode {ep_number}")
+                if existing_episodes is not None:
+                    existing_episodes[ep_number] = episode
+                logger.debug("Updated airing date for %s episode %s", anime.title_ukrainian, ep_number)
                 
             except Exception as e:
-                logger.error(f"Error processing airing schedule node: {str(e)}")
+                logger.error("Error processing airing schedule node: %s", e)
                 continue
     
     @staticmethod
-    def process_next_airing_episode(anime, next_episode_data):
+    def process_next_airing_episode(anime, next_episode_data, existing_episodes=None):
         """Process next airing episode from Anilist"""
         try:
             ep_number = next_episode_data.get('episode')
@@ -246,10 +339,13 @@ class EpisodeService:
                 return
                 
             # Find or create episode
-            episode = Episode.objects.filter(
-                anime=anime,
-                number=ep_number
-            ).first()
+            if existing_episodes is not None:
+                episode = existing_episodes.get(ep_number)
+            else:
+                episode = Episode.objects.filter(
+                    anime=anime,
+                    number=ep_number
+                ).first()
             
             if not episode:
                 episode = Episode(
@@ -267,7 +363,9 @@ class EpisodeService:
                 ).date()
             
             episode.save()
-            logger.info(f"Updated next airing episode {ep_number} for {anime.title_ukrainian}")
+            if existing_episodes is not None:
+                existing_episodes[ep_number] = episode
+            logger.debug("Updated next airing episode %s for %s", ep_number, anime.title_ukrainian)
             
         except Exception as e:
-            logger.error(f"Error processing next airing episode: {str(e)}")
+            logger.error("Error processing next airing episode: %s", e)
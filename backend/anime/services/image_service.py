@@ -1,13 +1,27 @@
 import logging
+from collections import defaultdict
 from anime.models import AnimeScreenshot
 
 logger = logging.getLogger(__name__)
 
+# Розміри обкладинки Anilist від найбільшого
+_COVER_SIZES = ('extraLarge', 'large', 'medium')
+
+# Кандидати зображень Jikan у порядку пріоритету: (формат, ключ розміру, опис)
+_JIKAN_IMAGE_CANDIDATES = (
+    ('jpg', 'large_image_url', 'jpg large'),
+    ('jpg', 'image_url', 'jpg image_url'),
+    ('jpg', 'small_image_url', 'jpg small'),
+    ('webp', 'large_image_url', 'webp large'),
+    ('webp', 'image_url', 'webp image_url'),
+    ('webp', 'small_image_url', 'webp small'),
+)
+
 class ImageService:
     """Service for processing and managing anime-related images"""
     
     @staticmethod
-    def process_screenshots(anime, jikan_data=None, anilist_data=None, max_screenshots=15, min_screenshots=5):
+    def process_screenshots(anime, jikan_data=None, anilist_data=None, max_screenshots=15, min_screenshots=5, existing_urls=None):
         """
         Process and save screenshots from both API sources, prioritizing streaming episodes
         
@@ -17,108 +31,82 @@ class ImageService:
             anilist_data: Optional data from Anilist API
             max_screenshots: Maximum number of screenshots to add
             min_screenshots: Minimum number of screenshots to aim for
+            existing_urls: Optional set of the anime's stored screenshot URLs,
+                prefetched by the caller; when given, no queries are issued
         """
+        # Відстежуємо URL-адреси, які вже додані
+        if existing_urls is None:
+            existing_urls = set(AnimeScreenshot.objects.filter(anime=anime).values_list('image_url', flat=True))
+        
         # Перевіряємо кількість існуючих скріншотів
-        existing_count = AnimeScreenshot.objects.filter(anime=anime).count()
+        existing_count = len(existing_urls)
         
         # Якщо у аніме вже достатньо скріншотів, пропускаємо
         if existing_count >= max_screenshots:
-            logger.info(f"Anime '{anime.title_original}' already has {existing_count} screenshots. Skipping.")
+            logger.debug("Anime '%s' already has %s screenshots. Skipping.", anime.title_original, existing_count)
             return
         
         # Скільки скріншотів ще потрібно
         screenshots_needed = max(min_screenshots - existing_count, 0)
-        screenshots_added = 0
         
-        # Відстежуємо URL-адреси, які вже додані
-        existing_urls = set(AnimeScreenshot.objects.filter(anime=anime).values_list('image_url', flat=True))
+        # Нові скріншоти збираємо у список і зберігаємо одним запитом
+        new_screenshots = []
         
+        def add_screenshot(image_url, description):
+            """Queue a screenshot; returns True once enough screenshots are collected"""
+            if not image_url or image_url in existing_urls:
+                return False
+            new_screenshots.append(AnimeScreenshot(anime=anime, image_url=image_url, description=description))
+            existing_urls.add(image_url)
+            return len(new_screenshots) >= screenshots_needed
+        
+        ImageService._collect_screenshots(add_screenshot, jikan_data, anilist_data)
+        
+        if new_screenshots:
+            AnimeScreenshot.objects.bulk_create(new_screenshots, ignore_conflicts=True, batch_size=500)
+        
+        logger.debug("Added %s new screenshots to anime '%s'", len(new_screenshots), anime.title_original)
+    
+    @staticmethod
+    def get_existing_urls(anime_ids):
+        """Return {anime_id: set of screenshot URLs} for a batch of anime in one query"""
+        existing = defaultdict(set)
+        rows = AnimeScreenshot.objects.filter(anime_id__in=anime_ids).values_list('anime_id', 'image_url')
+        for anime_id, image_url in rows:
+            existing[anime_id].add(image_url)
+        return existing
+    
+    @staticmethod
+    def _collect_screenshots(add_screenshot, jikan_data=None, anilist_data=None):
+        """Feed candidate screenshots to add_screenshot in priority order until it reports enough"""
         # First, try to get screenshots from AniList's streaming episodes which have better thumbnails
         if anilist_data and isinstance(anilist_data, dict) and anilist_data.get('streamingEpisodes'):
             for episode in anilist_data['streamingEpisodes']:
                 if episode and isinstance(episode, dict) and episode.get('thumbnail'):
-                    thumbnail_url = episode['thumbnail']
-                    # Перевіряємо, чи URL не є в базі даних
-                    if thumbnail_url not in existing_urls:
-                        title = episode.get('title', '')
-                        screenshot = AnimeScreenshot(
-                            anime=anime,
-                            image_url=thumbnail_url,
-                            description=f"Episode: {title}"
-                        )
-                        screenshot.save()
-                        existing_urls.add(thumbnail_url)
-                        screenshots_added += 1
-                        
-                        # Check if we have enough screenshots now
-                        if screenshots_added >= screenshots_needed:
-                            logger.info(f"Added {screenshots_added} new screenshots to anime '{anime.title_original}'")
-                            return
+                    title = episode.get('title', '')
+                    if add_screenshot(episode['thumbnail'], f"Episode: {title}"):
+                        return
         
         # Try Anilist trailer thumbnail
         if anilist_data and isinstance(anilist_data, dict) and anilist_data.get('trailer') and isinstance(anilist_data['trailer'], dict) and anilist_data['trailer'].get('thumbnail'):
-            thumbnail_url = anilist_data['trailer']['thumbnail']
-            if thumbnail_url not in existing_urls:
-                screenshot = AnimeScreenshot(
-                    anime=anime,
-                    image_url=thumbnail_url,
-                    description="Trailer thumbnail"
-                )
-                screenshot.save()
-                existing_urls.add(thumbnail_url)
-                screenshots_added += 1
-                if screenshots_added >= screenshots_needed:
-                    return
+            if add_screenshot(anilist_data['trailer']['thumbnail'], "Trailer thumbnail"):
+                return
         
         # Try Anilist cover images
         if anilist_data and isinstance(anilist_data, dict) and anilist_data.get('coverImage') and isinstance(anilist_data['coverImage'], dict):
-            for size_key in ['extraLarge', 'large', 'medium']:
-                if anilist_data['coverImage'].get(size_key):
-                    cover_url = anilist_data['coverImage'][size_key]
-                    if cover_url not in existing_urls:
-                        screenshot = AnimeScreenshot(
-                            anime=anime,
-                            image_url=cover_url,
-                            description=f"Cover {size_key}"
-                        )
-                        screenshot.save()
-                        existing_urls.add(cover_url)
-                        screenshots_added += 1
-                        if screenshots_added >= screenshots_needed:
-                            return
+            for size_key in _COVER_SIZES:
+                if add_screenshot(anilist_data['coverImage'].get(size_key), f"Cover {size_key}"):
+                    return
         
         # Add Anilist banner as screenshot if available
         if anilist_data and isinstance(anilist_data, dict) and anilist_data.get('bannerImage'):
-            banner_url = anilist_data['bannerImage']
-            if banner_url not in existing_urls:
-                screenshot = AnimeScreenshot(
-                    anime=anime,
-                    image_url=banner_url,
-                    description="Banner"
-                )
-                screenshot.save()
-                existing_urls.add(banner_url)
-                screenshots_added += 1
-                if screenshots_added >= screenshots_needed:
-                    return
+            if add_screenshot(anilist_data['bannerImage'], "Banner"):
+                return
         
         # Finally, use Jikan images
-        if jikan_data and isinstance(jikan_data, dict) and jikan_data.get('images') and isinstance(jikan_data['images'], dict):
-            for img_type in ['jpg', 'webp']:
-                if jikan_data['images'].get(img_type) and isinstance(jikan_data['images'][img_type], dict):
-                    for size in ['large_image_url', 'image_url', 'small_image_url']:
-                        if jikan_data['images'][img_type].get(size):
-                            image_url = jikan_data['images'][img_type][size]
-                            if image_url not in existing_urls:
-                                screenshot = AnimeScreenshot(
-                                    anime=anime,
-                                    image_url=image_url,
-                                    description=f"{img_type} {size.replace('_image_url', '')}"
-                                )
-                                screenshot.save()
-                                existing_urls.add(image_url)
-                                screenshots_added += 1
-                                if screenshots_added >= screenshots_needed:
-                                    return
-        
-        logger.info(f"Added {screenshots_added} new screenshots to anime '{anime.title_original}'")
+        images = jikan_data.get('images') if isinstance(jikan_data, dict) else None
+        if isinstance(images, dict):
+            for img_type, size, description in _JIKAN_IMAGE_CANDIDATES:
+                sizes = images.get(img_type)
+                if isinstance(sizes, dict) and add_screenshot(sizes.get(size), description):
+                    return
@@ -1,9 +1,10 @@
+import hashlib
 import logging
+import re
 import requests
-import time
-import html
-import os
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
+from django.core.cache import cache
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,14 @@ except ImportError:
     logger.warning("Translators package is not installed. Consider installing it for lightweight translation.")
     TRANSLATORS_AVAILABLE = False
 
+# Кана та ієрогліфи CJK, кирилиця - для грубого визначення мови за символами
+_CJK_RE = re.compile('[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff]')
+_CYRILLIC_RE = re.compile('[\u0400-\u04ff]')
+
+# Переклади не змінюються, тож зберігаємо їх надовго (секунди)
+TRANSLATION_CACHE_TTL = 60 * 60 * 24 * 30
+
+
 class TranslationService:
     """Сервіс для перекладу текстів на українську мову"""
 
@@ -35,6 +44,54 @@ class TranslationService:
         if not text:
             return ""
         
+        key = TranslationService._cache_key('translation', text, source_lang, target_lang)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        
+        result = TranslationService._translate_uncached(text, source_lang, target_lang)
+        # Невдалий переклад повертає оригінал - такий результат не кешуємо
+        if result and result != text:
+            cache.set(key, result, TRANSLATION_CACHE_TTL)
+        return result
+    
+    @staticmethod
+    def translate_batch(texts, source_lang=None, target_lang='uk', max_workers=4):
+        """
+        Переклад списку текстів; результат вирівняний зі вхідним списком
+        
+        Args:
+            texts (list): Тексти для перекладу
+            source_lang (str): Мова оригіналу; None - визначити для кожного тексту
+            target_lang (str): Цільова мова (по замовчуванню 'uk')
+            max_workers (int): Кількість паралельних запитів до сервісів перекладу
+            
+        Returns:
+            list: Перекладені тексти (оригінал, якщо переклад не вдався)
+        """
+        unique_texts = list(dict.fromkeys(text for text in texts if text))
+        
+        def translate(text):
+            lang = source_lang or TranslationService.detect_language(text)
+            return TranslationService.translate_text(text, source_lang=lang, target_lang=target_lang)
+        
+        if len(unique_texts) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                translated = dict(zip(unique_texts, executor.map(translate, unique_texts)))
+        else:
+            translated = {text: translate(text) for text in unique_texts}
+        
+        return [translated.get(text, "") if text else "" for text in texts]
+    
+    @staticmethod
+    def _cache_key(prefix, text, *parts):
+        """Build a fixed-length cache key from arbitrarily long text"""
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+        return ":".join((prefix, *parts, digest))
+    
+    @staticmethod
+    def _translate_uncached(text, source_lang='en', target_lang='uk'):
+        """Translate text through the available translation engines, without caching"""
         # First try using Translators package (lightweight wrapper for various translation APIs)
         if TRANSLATORS_AVAILABLE:
             try:
@@ -49,21 +106,21 @@ class TranslationService:
                             to_language=target_lang
                         )
                         if result and result != text:
-                            logger.info(f"Translation successful using {engine} engine")
+                            logger.debug("Translation successful using %s engine", engine)
                             return result
                     except Exception as e:
-                        logger.debug(f"Failed to translate with {engine}: {str(e)}")
+                        logger.debug("Failed to translate with %s: %s", engine, e)
                         continue
                 
                 logger.info("All translators engines failed, trying direct API")
             except Exception as e:
-                logger.warning(f"Failed to translate with translators package: {str(e)}")
+                logger.warning("Failed to translate with translators package: %s", e)
         
         # Use free Google API as fallback
         try:
             return TranslationService._translate_with_free_google(text, source_lang, target_lang)
         except Exception as e:
-            logger.error(f"All translation methods failed: {str(e)}")
+            logger.error("All translation methods failed: %s", e)
             return text  # Повертаємо оригінал, якщо всі методи перекладу не вдалися
     
     @staticmethod
@@ -107,6 +164,22 @@ class TranslationService:
         if not text:
             return 'en'  # Default to English for empty text
         
+        key = TranslationService._cache_key('language', text)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        
+        detected = TranslationService._detect_language_remote(text)
+        if detected:
+            cache.set(key, detected, TRANSLATION_CACHE_TTL)
+            return detected
+        
+        # Евристика за символами не кешується: наступного разу спробуємо сервіси знову
+        return TranslationService._guess_language_by_script(text)
+    
+    @staticmethod
+    def _detect_language_remote(text):
+        """Detect the language through the online services; None if none of them answered"""
         # Try using translators package for language detection
         if TRANSLATORS_AVAILABLE:
             try:
@@ -122,14 +195,14 @@ class TranslationService:
                             if result:
                                 return result
                         except Exception as e:
-                            logger.debug(f"Language detection with {provider} failed: {str(e)}")
+                            logger.debug("Language detection with %s failed: %s", provider, e)
                             continue
                 except Exception as e:
-                    logger.debug(f"All detection methods failed: {str(e)}")
+                    logger.debug("All detection methods failed: %s", e)
                     
                 logger.info("All translators detection engines failed")
             except Exception as e:
-                logger.warning(f"Translators language detection failed: {str(e)}")
+                logger.warning("Translators language detection failed: %s", e)
                 
         # Fallback to other methods
         return TranslationService._detect_language_fallback(text)
@@ -143,7 +216,7 @@ class TranslationService:
             text (str): Text to analyze
             
         Returns:
-            str: Language code (e.g., 'en', 'ja', 'uk')
+            str: Language code (e.g., 'en', 'ja', 'uk'), or None if detection failed
         """
         try:
             # Try using a free API for language detection
@@ -167,16 +240,21 @@ class TranslationService:
                 if isinstance(detected_lang, str) and detected_lang:
                     return detected_lang
             
-            logger.warning(f"Unexpected response format from free Google Translate API: {result}")
+            logger.warning("Unexpected response format from free Google Translate API: %s", result)
             
         except Exception as e:
-            logger.warning(f"Fallback language detection failed: {str(e)}")
-            
-        # If everything fails, check for common Japanese/Ukrainian characters
+            logger.warning("Fallback language detection failed: %s", e)
+        
+        return None
+    
+    @staticmethod
+    def _guess_language_by_script(text):
+        """Guess the language from the characters used when no detection service answered"""
+        # Check for common Japanese/Ukrainian characters
         # or just return English as default
-        if any('\u3040' <= c <= '\u30ff' or '\u3400' <= c <= '\u4dbf' or '\u4e00' <= c <= '\u9fff' for c in text):
+        if _CJK_RE.search(text):
             return 'ja'  # Likely Japanese
-        elif any('\u0400' <= c <= '\u04FF' for c in text):
+        elif _CYRILLIC_RE.search(text):
             return 'uk'  # Likely Ukrainian/Russian
             
         return 'en'  # Default to English
\ No newline at end of file
@@ -35,7 +35,7 @@ class UpdateScheduler:
                 anime.save(update_fields=['update_priority'])
                 count += 1
         
-        logger.info(f"Recalculated priorities for {count} anime")
+        logger.info("Recalculated priorities for %s anime", count)
         return count
     
     @staticmethod
@@ -47,7 +47,7 @@ class UpdateScheduler:
             anime.save(update_fields=['next_update_scheduled'])
             count += 1
             
-        logger.info(f"Rescheduled updates for {count} anime")
+        logger.info("Rescheduled updates for %s anime", count)
         return count
     
     @staticmethod
@@ -67,7 +67,7 @@ class UpdateScheduler:
                 last_metadata_update__lt=timezone.now() - timedelta(days=7)
             )
         elif update_type == 'episodes':
-            type_query = Q(status='ongoing') & (
+            type_query = Q(status=Anime.Status.ONGOING) & (
                 Q(last_episodes_update__isnull=True) | 
                 Q(last_episodes_update__lt=timezone.now() - timedelta(days=1))
             )
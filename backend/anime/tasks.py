@@ -45,6 +45,24 @@ def fetch_top_anime_task(self, page=1, limit=25):
         # Retry the task with exponential backoff
         raise self.retry(exc=ex, countdown=60 * (2 ** self.request.retries))
 
+@shared_task(bind=True, max_retries=3)
+def fetch_top_anime_pages_task(self, max_pages=4, limit=25):
+    """Task to import several pages of top anime, downloading the next page while the current one is saved"""
+    logger.info("Fetching top anime pages (max pages %s, limit %s)", max_pages, limit)
+    
+    try:
+        fetcher = JikanAPIFetcher()
+        processed_count = 0
+        
+        for page_data in fetcher.iter_top_anime_pages(max_pages=max_pages, limit=limit):
+            processed_count += len(AnimeProcessor.process_jikan_anime_batch(page_data))
+        
+        return f"Successfully processed {processed_count} top anime from {max_pages} pages"
+    except Exception as ex:
+        logger.error("Unexpected error in fetch_top_anime_pages_task: %s", ex)
+        logger.error(traceback.format_exc())
+        raise self.retry(exc=ex, countdown=60 * (2 ** self.request.retries))
+
 @shared_task(bind=True, max_retries=3)
 def fetch_seasonal_anime_task(self, year=None, season=None):
     """Task to fetch seasonal anime from both Jikan and Anilist APIs"""
@@ -139,8 +157,7 @@ def fetch_popular_anilist_anime_task(self, page=1, per_page=25):
                     )
                     processed_count += 1
             except Exception as e:
-                logger.error(f"Error processing anime {anime_data.get('title', {}).get('romaji')}: {str(e)}")
-                logger.debug(traceback.format_exc())
+                logger.error("Error processing anime %s: %s", anime_data.get('title', {}).get('romaji'), e, exc_info=logger.isEnabledFor(logging.DEBUG))
         
         return f"Processed {processed_count} anime from Anilist API"
     except Exception as ex:
@@ -186,30 +203,48 @@ def update_anime_screenshots_task(self, mal_id=None, count=None):
             anime_with_few_screenshots = Anime.objects.annotate(
                 screenshots_count=models.Count('screenshots')
             ).filter(screenshots_count__lt=5).order_by('?')[:count]
+            anime_with_few_screenshots = [anime for anime in anime_with_few_screenshots if anime.mal_id]
+            
+            # Fetch API data for the whole batch up front: Jikan details in parallel,
+            # Anilist entries in aliased batches
+            mal_ids = [anime.mal_id for anime in anime_with_few_screenshots]
+            jikan_fetcher = JikanAPIFetcher()
+            anilist_fetcher = AnilistAPIFetcher()
+            
+            # A failed batch falls back to fetching each anime on its own below
+            try:
+                jikan_details = jikan_fetcher.fetch_anime_details_many(mal_ids)
+            except Exception as e:
+                logger.warning("Batch Jikan fetch failed, fetching anime one by one: %s", e)
+                jikan_details = None
+            try:
+                anilist_details = anilist_fetcher.fetch_anime_by_ids(mal_ids)
+            except Exception as e:
+                logger.warning("Batch Anilist fetch failed, fetching anime one by one: %s", e)
+                anilist_details = None
             
-            for anime in anime_with_few_screenshots:
+            for index, anime in enumerate(anime_with_few_screenshots):
                 try:
-                    if anime.mal_id:
-                        # Fetch data from APIs
-                        jikan_fetcher = JikanAPIFetcher()
-                        anilist_fetcher = AnilistAPIFetcher()
-                        
+                    if jikan_details is not None:
+                        jikan_data = jikan_details[index]
+                    else:
                         jikan_data = jikan_fetcher.fetch_anime_details(anime.mal_id)
+                    if anilist_details is not None:
+                        anilist_data = anilist_details[index]
+                    else:
                         anilist_data = anilist_fetcher.fetch_anime_by_id(anime.mal_id)
-                        
-                        # Process screenshots
-                        ImageService.process_screenshots(anime, jikan_data, anilist_data)
-                        
-                        # Record update
-                        UpdateScheduler.record_update_attempt(
-                            anime=anime,
-                            update_type='images',
-                            success=True
-                        )
-                        
-                        processed += 1
-                        # Add a small delay to avoid overwhelming APIs
-                        time.sleep(1)
+                    
+                    # Process screenshots
+                    ImageService.process_screenshots(anime, jikan_data, anilist_data)
+                    
+                    # Record update
+                    UpdateScheduler.record_update_attempt(
+                        anime=anime,
+                        update_type='images',
+                        success=True
+                    )
+                    
+                    processed += 1
                 except Exception as e:
                     logger.error(f"Error updating screenshots for anime {anime.title_ukrainian}: {str(e)}")
             
@@ -436,8 +471,7 @@ def update_anime_by_priority_task(self, batch_size=None, update_type='full'):
                         failed_updates += 1
                 
             except Exception as e:
-                logger.error(f"Error updating anime {anime.title_ukrainian}: {str(e)}")
-                logger.error(traceback.format_exc())
+                logger.error("Error updating anime %s: %s", anime.title_ukrainian, e, exc_info=logger.isEnabledFor(logging.DEBUG))
                 UpdateScheduler.record_update_attempt(
                     anime=anime,
                     update_type=update_type,